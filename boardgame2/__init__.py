@@ -3,6 +3,13 @@ from .env import *
 from .reversi import *
 from .kinarow import *
 from .go import *
+from .vector import *
+from .selfplay import *
+from .record import *
+from .features import *
+from .mcts import *
+from .evaluation import *
+from .solve import *
 
 
 register(
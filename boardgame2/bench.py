@@ -0,0 +1,182 @@
+"""Benchmark the envs.
+
+Usage: python -m boardgame2.bench [--env ENV_ID] [--board-size N] [--output FILE]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+import gym
+
+from .selfplay import play_game, random_agent
+
+
+DEFAULT_CASES = [
+        ('TicTacToe-v0', {}),
+        ('KInARow-v0', {'board_shape': 5, 'target_length': 4}),
+        ('Gomuku-v0', {}),
+        ('Reversi-v0', {'board_shape': 6}),
+        ('Reversi-v0', {'board_shape': 8}),
+        ('Go-v0', {'board_shape': 5}),
+        ('Go-v0', {'board_shape': 9}),
+        ]
+
+
+def time_calls(function, args_list, min_time: float=0.2) -> float:
+    """Measure the throughput of a function.
+
+    Parameters
+    ----
+    function : callable
+    args_list : list of tuple    arguments of the calls, used in turn
+    min_time : float    seconds to measure at least
+
+    Returns
+    ----
+    calls_per_second : float
+    """
+    calls = 0
+    tic = time.perf_counter()
+    while True:
+        for args in args_list:
+            function(*args)
+        calls += len(args_list)
+        seconds = time.perf_counter() - tic
+        if seconds >= min_time:
+            return calls / seconds
+
+
+def collect_positions(env, num_games: int, max_length: int) -> tuple:
+    """Play random games, and keep the positions.
+
+    Parameters
+    ----
+    env : BoardGameEnv
+    num_games : int
+    max_length : int    games are truncated after so many actions
+
+    Returns
+    ----
+    positions : list of (state, action)    the states and the actions played
+    steps_per_second : float    throughput of the random playouts
+    """
+    positions = []
+
+    def agent(env, observation):
+        action = random_agent(env, observation)
+        positions.append((observation, action))
+        return action
+
+    tic = time.perf_counter()
+    for _ in range(num_games):
+        play_game(env, (agent, agent), max_length=max_length)
+    seconds = time.perf_counter() - tic
+    return positions, len(positions) / seconds
+
+
+def run_case(env_id: str, kwargs: dict, num_games: int=10, min_time: float=0.2,
+        seed: int=0) -> dict:
+    """Benchmark an env.
+
+    Parameters
+    ----
+    env_id : str    registered id
+    kwargs : dict    keyword arguments for gym.make()
+    num_games : int    number of random games played to collect positions
+    min_time : float    seconds to measure every method at least
+    seed : int
+
+    Returns
+    ----
+    result : dict    the case, and the throughputs per second of
+        'playout_steps', 'reset', 'step', 'is_valid', 'get_valid',
+        'has_valid', 'get_winner', 'get_next_state' and 'rollouts' (random
+        playouts from the initial state by env.rollout())
+    """
+    np.random.seed(seed)
+    env = gym.make(env_id, **{'new_step_api': True, **kwargs}).unwrapped
+    max_length = 4 * env.board.size
+    positions, steps_per_second = collect_positions(env, num_games, max_length)
+    states = [(state,) for state, _ in positions]
+    actions = [(state, action) for state, action in positions]
+
+    def step(state, action):
+        env.reset()
+        env.step(action)
+
+    result = {'env_id': env_id, 'kwargs': kwargs, 'board_shape': list(env.board.shape),
+            'positions': len(positions), 'playout_steps': steps_per_second}
+    result['reset'] = time_calls(env.reset, [()], min_time)
+    result['step'] = time_calls(step, actions[:1], min_time)  # with a reset
+    result['is_valid'] = time_calls(env.is_valid, actions, min_time)
+    result['get_valid'] = time_calls(env.get_valid, states, min_time)
+    result['has_valid'] = time_calls(env.has_valid, states, min_time)
+    result['get_winner'] = time_calls(env.get_winner, states, min_time)
+    result['get_next_state'] = time_calls(env.get_next_state, actions, min_time)
+    initial_state, _ = env.reset()
+    rng = np.random.default_rng(seed)
+    result['rollouts'] = time_calls(env.rollout, [(initial_state, 16, rng, max_length)],
+            min_time) * 16
+    env.close()
+    return result
+
+
+def run(cases=None, num_games: int=10, min_time: float=0.2, seed: int=0) -> dict:
+    """Benchmark envs.
+
+    Parameters
+    ----
+    cases : list of (str, dict) or None    env ids and keyword arguments for
+        gym.make(). None means DEFAULT_CASES.
+
+    Returns
+    ----
+    report : dict    the platform and the results of all cases
+    """
+    cases = DEFAULT_CASES if cases is None else cases
+    results = [run_case(env_id, kwargs, num_games=num_games, min_time=min_time, seed=seed)
+            for env_id, kwargs in cases]
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'gym': gym.__version__, 'machine': platform.machine(),
+            'processor': platform.processor(), 'time': time.time(), 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m boardgame2.bench',
+            description='Benchmark the boardgame2 envs, and print JSON.')
+    parser.add_argument('--env', action='append', dest='env_ids', metavar='ENV_ID',
+            help='registered env id; can be repeated (default: all)')
+    parser.add_argument('--board-size', action='append', type=int, dest='board_sizes',
+            metavar='N', help='board size of the envs; can be repeated')
+    parser.add_argument('--games', type=int, default=10,
+            help='random games played per case (default: 10)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+            help='seconds to measure every method (default: 0.2)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON to a file instead of stdout')
+    args = parser.parse_args(argv)
+
+    cases = DEFAULT_CASES
+    if args.env_ids:
+        cases = [case for case in cases if case[0] in args.env_ids] + \
+                [(env_id, {}) for env_id in args.env_ids
+                if env_id not in [case[0] for case in DEFAULT_CASES]]
+    if args.board_sizes:
+        env_ids = list(dict.fromkeys(env_id for env_id, _ in cases))
+        cases = [(env_id, {'board_shape': size}) for env_id in env_ids
+                for size in args.board_sizes]
+    report = run(cases, num_games=args.games, min_time=args.min_time, seed=args.seed)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import collections
+import functools
+
+import numpy as np
+
+
+class LRUCache:
+
+    ENTRY_BYTES = 200  # rough size of a key, a dict slot and a small value
+
+    def __init__(self, max_bytes: int):
+        """Create a cache that evicts the least recently used entries.
+
+        Parameters
+        ----
+        max_bytes : int    memory budget. Each entry is counted as
+            ENTRY_BYTES plus the bytes of its array value.
+        """
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Get a value and mark it as recently used.
+
+        Parameters
+        ----
+        key : hashable
+        default : object    returned when the key is missing
+
+        Returns
+        ----
+        value : object
+        """
+        try:
+            value, _ = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Put a value, and evict the least recently used entries if over budget.
+
+        Parameters
+        ----
+        key : hashable
+        value : object    arrays are made read-only, since they are shared
+        """
+        size = self.ENTRY_BYTES
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+            size += value.nbytes
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and self.entries:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        self.entries.clear()
+        self.bytes = self.hits = self.misses = 0
+
+    def info(self) -> dict:
+        """Get the statistics of the cache.
+
+        Returns
+        ----
+        info : dict    hits, misses, entries, bytes and max_bytes
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(self.entries), 'bytes': self.bytes,
+                'max_bytes': self.max_bytes}
+
+    def wrap(self, name: str, method, make_key):
+        """Memoize a method whose result only depends on the state.
+
+        Parameters
+        ----
+        name : str    name of the method, which is part of the key
+        method : callable    method(state, *args, **kwargs)
+        make_key : callable    make_key(state) -> hashable
+
+        Returns
+        ----
+        wrapped : callable
+        """
+        missing = object()
+
+        @functools.wraps(method)
+        def wrapped(state, *args, **kwargs):
+            key = (name, make_key(state))
+            value = self.get(key, missing)
+            if value is missing:
+                value = method(state, *args, **kwargs)
+                self.put(key, value)
+            return value
+        return wrapped
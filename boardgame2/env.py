@@ -1,16 +1,23 @@
 import sys
-import copy
+import functools
 
 from six import StringIO
 import numpy as np
 import gym
 from gym import spaces
 
+from .cache import LRUCache
+from .profiling import CallProfiler
+
 
 EMPTY = 0
 BLACK = 1
 WHITE = -1
 
+NO_CHANGE = (np.array([], dtype=int), np.array([], dtype=np.int8))
+
+ROLLOUT_DTYPE = np.dtype([('winner', np.int8), ('length', np.int32), ('truncated', np.bool_)])
+
 
 def strfboard(board: np.array, render_characters: str='+ox', end: str='\n') -> str:
     """Format a board as a string
@@ -52,7 +59,8 @@ def is_index(board: np.array, location: np.array) -> str:
     if len(location) != 2:
         return False
     x, y = location
-    return x in range(board.shape[0]) and y in range(board.shape[1])
+    h, w = board.shape
+    return 0 <= x < h and 0 <= y < w
 
 
 def extend_board(board: np.array) -> np.array:
@@ -74,6 +82,253 @@ def extend_board(board: np.array) -> np.array:
     return boards
 
 
+@functools.lru_cache(maxsize=None)
+def get_symmetries(board_shape) -> tuple:
+    """Get the symmetries of boards with a shape.
+
+    Parameters
+    ----
+    board_shape : (int, int)
+
+    Returns
+    ----
+    transforms : np.array    indices of the symmetries in the order of extend_board().
+        All 8 for square boards; only 0, 2, 5, 7 for other boards.
+    permutations : np.array, shape (len(transforms), h * w)
+        board.ravel()[permutations[i]] is the i-th transformed board, flattened.
+    weights : np.array, shape (h * w, len(transforms))
+        board.ravel() @ weights[:, i] is a hash of the i-th transformed board.
+    """
+    h, w = board_shape
+    locations = np.arange(h * w).reshape(board_shape)
+    if h == w:
+        transforms = np.arange(8)
+        permutations = extend_board(locations).reshape(8, -1)
+    else:
+        transforms = np.array([0, 2, 5, 7])
+        permutations = np.stack([locations, np.rot90(locations, k=2),
+                np.flipud(locations), np.fliplr(locations)]).reshape(4, -1)
+    keys = np.random.default_rng(20190802).integers(np.iinfo(np.int64).max,
+            size=h * w, dtype=np.int64)
+    weights = np.stack([keys[np.argsort(permutation)] for permutation in permutations],
+            axis=1)
+    for array in [transforms, permutations, weights]:
+        array.flags.writeable = False
+    return transforms, permutations, weights
+
+
+def canonicalize(board: np.array) -> tuple:
+    """Get the canonical representative among the symmetries of the board.
+
+    The symmetries are hashed with one matrix product, and only the one with
+    the smallest hash is built. Symmetric boards get the same representative.
+    The player is not changed by symmetries.
+
+    Parameters
+    ----
+    board : np.array, shape (h, w) or (N, h, w)
+
+    Returns
+    ----
+    canonical : np.array    the representative, with the same shape as board
+    transform : int or np.array    index of the symmetry in the order of extend_board()
+    inverse : np.array, shape (h * w,) or (N, h * w)
+        the flat location in board of each flat location in canonical. Use it
+        to map actions chosen on canonical back to board.
+    """
+    board = np.asarray(board)
+    transforms, permutations, weights = get_symmetries(board.shape[-2:])
+    flat = board.reshape(-1, board.shape[-2] * board.shape[-1])
+    hashes = flat.astype(np.int64) @ weights
+    best = hashes.argmin(axis=-1)
+    inverse = permutations[best]
+    canonical = np.take_along_axis(flat, inverse, axis=-1).reshape(board.shape)
+    if board.ndim == 2:
+        return canonical, int(transforms[best[0]]), inverse[0]
+    return canonical, transforms[best], inverse
+
+
+@functools.lru_cache(maxsize=None)
+def get_zobrist_table(board_shape) -> np.array:
+    """Get the random keys used to hash boards.
+
+    The keys are drawn from a fixed seed, so hashes agree across processes.
+
+    Parameters
+    ----
+    board_shape : (int, int)
+
+    Returns
+    ----
+    table : np.array, shape (3, h * w + 1), dtype np.uint64
+        - table[player + 1, x * w + y] is the key of player at (x, y),
+          and the keys of EMPTY are zeros;
+        - table[WHITE + 1, -1] is the key of WHITE to move.
+    """
+    size = board_shape[0] * board_shape[1]
+    rng = np.random.default_rng(20190801)
+    table = rng.integers(np.iinfo(np.uint64).max, size=(3, size + 1),
+            dtype=np.uint64, endpoint=True)
+    table[EMPTY + 1] = 0
+    table[BLACK + 1, -1] = 0
+    table.flags.writeable = False
+    return table
+
+
+def pack_board(board: np.array) -> np.array:
+    """Pack boards into two bit-planes, 2 bits per cell.
+
+    Parameters
+    ----
+    board : np.array    board of shape (h, w), or boards of shape (..., h, w)
+
+    Returns
+    ----
+    packed : np.array    uint8 of shape (..., ceil(2 * h * w / 8)). The bits
+        are the BLACK plane followed by the WHITE plane, both flattened.
+    """
+    board = np.asarray(board)
+    planes = np.stack([board == BLACK, board == WHITE], axis=-3)
+    return np.packbits(planes.reshape(board.shape[:-2] + (-1,)), axis=-1)
+
+
+def unpack_planes(packed: np.array, board_shape, dtype=np.float32) -> np.array:
+    """Unpack boards packed by pack_board() to planes for neural networks.
+
+    Parameters
+    ----
+    packed : np.array    uint8 of shape (..., ceil(2 * h * w / 8))
+    board_shape : (int, int)
+    dtype : np.dtype
+
+    Returns
+    ----
+    planes : np.array    shape (..., 2, h, w). Plane 0 is BLACK and plane 1 is WHITE.
+    """
+    h, w = board_shape
+    bits = np.unpackbits(packed, axis=-1, count=2 * h * w)
+    return bits.reshape(packed.shape[:-1] + (2, h, w)).astype(dtype, copy=False)
+
+
+def unpack_board(packed: np.array, board_shape) -> np.array:
+    """Unpack boards packed by pack_board().
+
+    Parameters
+    ----
+    packed : np.array    uint8 of shape (..., ceil(2 * h * w / 8))
+    board_shape : (int, int)
+
+    Returns
+    ----
+    board : np.array    int8 of shape (..., h, w)
+    """
+    planes = unpack_planes(packed, board_shape, dtype=np.int8)
+    return planes[..., 0, :, :] - planes[..., 1, :, :]
+
+
+def readonly_view(array: np.array) -> np.array:
+    """Get a read-only view of an array without copying.
+
+    Parameters
+    ----
+    array : np.array
+
+    Returns
+    ----
+    view : np.array    shares memory with array, but can not be written through
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def encode_action(action: np.array, board_shape) -> int:
+    """Encode an action as a cell index.
+
+    Parameters
+    ----
+    action : np.array    location, PASS or RESIGN
+    board_shape : (int, int)
+
+    Returns
+    ----
+    code : int    x * width + y for locations, height * width for PASS,
+        and height * width + 1 for RESIGN
+    """
+    h, w = board_shape
+    if np.array_equal(action, BoardGameEnv.PASS):
+        return h * w
+    if np.array_equal(action, BoardGameEnv.RESIGN):
+        return h * w + 1
+    x, y = action
+    return int(x) * w + int(y)
+
+
+def decode_action(code: int, board_shape) -> np.array:
+    """Decode a cell index made by encode_action().
+
+    Parameters
+    ----
+    code : int
+    board_shape : (int, int)
+
+    Returns
+    ----
+    action : np.array    location, PASS or RESIGN
+    """
+    h, w = board_shape
+    if code == h * w:
+        return BoardGameEnv.PASS
+    if code == h * w + 1:
+        return BoardGameEnv.RESIGN
+    return np.array(divmod(int(code), w))
+
+
+class GameState:
+
+    __slots__ = ('board', 'player', 'key', 'move_count')
+
+    def __init__(self, board: np.array, player: int, key=None, move_count: int=0):
+        """Create a compact state.
+
+        The state unpacks and indexes like the tuple (board, player), so it
+        can be used wherever a tuple state is accepted.
+
+        Parameters
+        ----
+        board : np.array    int8 board
+        player : int    the player to move
+        key : int or None    cached Zobrist hash, or None if unknown.
+            Code that changes the board in place, such as make_move(), resets it.
+        move_count : int    number of moves played, including passes
+        """
+        self.board = board
+        self.player = player
+        self.key = key
+        self.move_count = move_count
+
+    def astuple(self) -> tuple:
+        """Get the tuple view of the state, which is used as gym observations."""
+        return self.board, self.player
+
+    def __iter__(self):
+        return iter(self.astuple())
+
+    def __len__(self):
+        return len(self.astuple())
+
+    def __getitem__(self, index):
+        if index == 0:
+            return self.board
+        if index == 1:
+            return self.player
+        return self.astuple()[index]
+
+    def __repr__(self):
+        return '{}(player={}, move_count={}, key={})\n{}'.format(type(self).__name__,
+                self.player, self.move_count, self.key, strfboard(self.board))
+
+
 class BoardGameEnv(gym.Env):
 
     metadata = {"render_modes": ["ansi", "human"]}
@@ -82,8 +337,23 @@ class BoardGameEnv(gym.Env):
     PASS = np.array([-1, 0])
     RESIGN = np.array([-1, -1])
 
+    PROFILED_METHODS = ('is_valid', 'get_valid', 'has_valid', 'get_winner',
+            'get_next_state', 'make_move', 'unmake_move', 'next_step', 'step')
+    CACHED_METHODS = ('get_valid', 'has_valid', 'get_winner')
+
+    # whether the valid locations are exactly the empty ones, so that
+    # get_valid() and has_valid() are computed by array operations.
+    # Subclasses whose is_valid() is the empty check opt in by setting it True.
+    VALID_IS_EMPTY = False
+
+    # whether next_step() checks that the next player has valid locations,
+    # and passes otherwise. Games where a player can always move until the
+    # game ends set it False to skip the check.
+    AUTO_PASS = True
+
     def __init__(self, board_shape, illegal_action_mode: str='resign',
-            render_characters: str='+ox', allow_pass: bool=True):
+            render_characters: str='+ox', allow_pass: bool=True,
+            action_mode: str='box'):
         """Create a board game.
 
         Parameters
@@ -98,8 +368,15 @@ class BoardGameEnv(gym.Env):
         allow_pass: bool=True
             - True:  allow pass
             - False: not allow pass
+        action_mode: str='box'
+            - 'box':      actions are locations np.array([x, y]), PASS or RESIGN
+            - 'discrete': actions are ints encoded by encode_action(), and
+              info['action_mask'] holds the valid actions
         """
         self.allow_pass = allow_pass
+        if action_mode not in ['box', 'discrete']:
+            raise ValueError('unknown action_mode {}'.format(action_mode))
+        self.action_mode = action_mode
 
         if illegal_action_mode == 'resign':
             self.illegal_equivalent_action = self.RESIGN
@@ -114,15 +391,19 @@ class BoardGameEnv(gym.Env):
         if isinstance(board_shape, int):
             board_shape = (board_shape, board_shape)
         assert len(board_shape) == 2  # invalid board shape
-        self.board = np.zeros(board_shape)
+        self.board = np.zeros(board_shape, dtype=np.int8)
         assert self.board.size > 1  # Invalid board shape
 
         observation_spaces = [
                 spaces.Box(low=-1, high=1, shape=board_shape, dtype=np.int8),
                 spaces.Box(low=-1, high=1, shape=(), dtype=np.int8)]
         self.observation_space = spaces.Tuple(observation_spaces)
-        self.action_space = spaces.Box(low=-np.ones((2,)),
-                high=np.array(board_shape)-1, dtype=np.int8)
+        if action_mode == 'discrete':
+            self.action_space = spaces.Discrete(self.board.size + 2)
+        else:
+            self.action_space = spaces.Box(low=-np.ones((2,)),
+                    high=np.array(board_shape)-1, dtype=np.int8)
+        self.action_mask = None
 
     def reset(self, *, seed=None, return_info=True, options=None):
         """Reset a new game episode. See gym.Env.reset()
@@ -139,9 +420,12 @@ class BoardGameEnv(gym.Env):
         """
         self.board = np.zeros_like(self.board, dtype=np.int8)
         self.player = BLACK
-        next_state = (self.board, self.player)
+        self.move_count = 0
+        next_state = (readonly_view(self.board), self.player)
+        self.key = self.hash_state(next_state)
+        info = self.update_action_mask(next_state, {'hash': self.key})
         if return_info:
-            return next_state, {}
+            return next_state, info
         else:
             return next_state
 
@@ -174,7 +458,9 @@ class BoardGameEnv(gym.Env):
         ----
         valid : np.array     current valid place for the player
         """
-        board, _ = state
+        board = state[0]
+        if self.VALID_IS_EMPTY:
+            return (board == EMPTY).astype(np.int8)
         valid = np.zeros_like(board, dtype=np.int8)
         for x in range(board.shape[0]):
             for y in range(board.shape[1]):
@@ -193,6 +479,8 @@ class BoardGameEnv(gym.Env):
         has_valid : bool
         """
         board = state[0]
+        if self.VALID_IS_EMPTY:
+            return bool((board == EMPTY).any())
         for x in range(board.shape[0]):
             for y in range(board.shape[1]):
                 if self.is_valid(state, np.array([x, y])):
@@ -230,54 +518,214 @@ class BoardGameEnv(gym.Env):
 
         Returns
         ----
-        next_state : (np.array, int)    next board and next player
+        next_state : GameState    next board and next player
 
         Raise
         ----
         ValueError : location in action is not valid
         """
         board, player = state
+        next_state = GameState(board.copy(), player,
+                move_count=getattr(state, 'move_count', 0) + 1)
+        key = getattr(state, 'key', None)
+        undo = self.make_move(next_state, action)
+        if key is not None:
+            next_state.key = self.update_hash(key, next_state, undo)
+        next_state.player = -player
+        return next_state
+
+    def get_all_next_states(self, state) -> tuple:
+        """Get the next states of all valid actions of a state at once.
+
+        Valid locations are scanned once. If no location is valid, the only
+        action is PASS. Subclasses override this with kernels for their rules.
+
+        Parameters
+        ----
+        state : (np.array, int)    board and current player
+
+        Returns
+        ----
+        codes : np.array    the valid actions encoded by encode_action(), of shape (K,)
+        next_states : tuple    batched components of the next states: boards
+            of shape (K, H, W) and players of shape (K,)
+        """
+        board, player = state[0], state[1]
+        codes = np.flatnonzero(self.get_valid(state))
+        boards = np.repeat(np.asarray(board, dtype=np.int8)[np.newaxis],
+                max(len(codes), 1), axis=0)
+        players = np.full(len(boards), -player, dtype=np.int8)
+        if not len(codes):
+            return np.array([board.size]), (boards, players)  # PASS
+        if self.VALID_IS_EMPTY:
+            boards.reshape(len(codes), -1)[np.arange(len(codes)), codes] = player
+        else:
+            for next_board, code in zip(boards, codes.tolist()):
+                self.make_move((next_board, player), decode_action(code, board.shape))
+        return codes, (boards, players)
+
+    def make_move(self, state, action):
+        """Play an action by changing the board in place.
+
+        The next player is -player. Invalid actions leave the board unchanged.
+
+        Parameters
+        ----
+        state : (np.array, int)    board and current player. The board is changed.
+        action : np.array    location
+
+        Returns
+        ----
+        undo : (np.array, np.array)    flat indices of changed locations and their previous values
+        """
+        board, player = state
+        if isinstance(state, GameState):
+            state.key = None
+        if not self.is_valid(state, action):
+            return NO_CHANGE
         x, y = action
-        if self.is_valid(state, action):
-            board = copy.deepcopy(board)
-            board[x, y] = player
-        return board, -player
+        board[x, y] = player
+        return np.array([x * board.shape[1] + y]), np.array([EMPTY], dtype=np.int8)
+
+    def unmake_move(self, state, undo):
+        """Take back an action played by make_move().
+
+        Parameters
+        ----
+        state : (np.array, int)    board and player after the action. The board is changed.
+        undo : tuple    returned by make_move()
+        """
+        indices, previous = undo[:2]
+        state[0].flat[indices] = previous
+        if isinstance(state, GameState):
+            state.key = None
+
+    def hash_state(self, state) -> int:
+        """Get the Zobrist hash of a state.
+
+        Parameters
+        ----
+        state : (np.array, int)    board and player
+
+        Returns
+        ----
+        key : int    64-bit hash of the board and the player to move
+        """
+        key = getattr(state, 'key', None)
+        if key is not None:
+            return key
+        board, player = state[0], state[1]
+        table = get_zobrist_table(board.shape)
+        key = np.bitwise_xor.reduce(table[board.ravel() + 1, np.arange(board.size)])
+        if player == WHITE:
+            key ^= table[WHITE + 1, -1]
+        if isinstance(state, GameState):
+            state.key = int(key)
+        return int(key)
+
+    def cache_key(self, state):
+        """Get the key of a state in the cache of enable_cache().
+
+        It must cover everything that get_valid(), has_valid() and
+        get_winner() depend on.
 
-    def next_step(self, state, action):
+        Parameters
+        ----
+        state : (np.array, int)    board and player
+
+        Returns
+        ----
+        key : hashable    the Zobrist hash of the state
+        """
+        return self.hash_state(state)
+
+    def update_hash(self, key: int, state, undo) -> int:
+        """Update the Zobrist hash after make_move().
+
+        Only the locations recorded in the undo token are visited.
+
+        Parameters
+        ----
+        key : int    hash of the state before make_move()
+        state : (np.array, int)    board and player, where the board has been
+            changed by make_move() but the player has not
+        undo : tuple    returned by make_move()
+
+        Returns
+        ----
+        key : int    hash of the next state
+        """
+        board = state[0]
+        indices, previous = undo[:2]
+        table = get_zobrist_table(board.shape)
+        changes = table[previous + 1, indices] ^ table[board.flat[indices] + 1, indices]
+        key ^= int(np.bitwise_xor.reduce(changes)) if len(indices) else 0
+        return key ^ int(table[WHITE + 1, -1])
+
+    def next_step(self, state, action, key=None):
         """Get the next observation, reward, termination, and info.
 
         Parameters
         ----
         state : (np.array, int)    board and current player
         action : np.array    location
+        key : int or None    the Zobrist hash of state. If given or cached in
+            state, the hash of the next state is updated incrementally and put
+            into info['hash'].
 
         Returns
         ----
-        next_state : (np.array, int)    next board and next player
+        next_state : GameState    next board and next player
         reward : float               the winner or zeros
         termination : bool           whether the game end or not
-        info : {'valid' : np.array}    a dict shows the valid place for the next player
+        info : {'hash' : int}    a dict shows the hash of the next state
         """
+        if key is None:
+            key = getattr(state, 'key', None)
+        info = {} if key is None else {'hash': key}
         if not self.is_valid(state, action):
             action = self.illegal_equivalent_action
         if np.array_equal(action, self.RESIGN):
-            return state, -state[1], True, {}
+            return state, -state[1], True, info
+        board, player = state[0], state[1]
+        state = GameState(board.copy(), player, move_count=getattr(state, 'move_count', 0))
         while True:
-            state = self.get_next_state(state, action)
-            winner = self.get_winner(state)
+            undo = self.make_move(state, action)
+            if key is not None:
+                info['hash'] = key = self.update_hash(key, state, undo)
+            state.player = -state.player
+            state.key = key
+            state.move_count += 1
+            winner = self.get_next_winner(state, action)
             if winner is not None:
-                return state, winner, True, {}
-            if self.has_valid(state):
+                return state, winner, True, info
+            if not self.AUTO_PASS or self.has_valid(state):
                 break
             action = self.PASS
-        return state, 0., False, {}
+        return state, 0., False, info
+
+    def get_next_winner(self, state, action):
+        """Check the winner of the state reached by an action, for next_step().
+
+        Subclasses may examine only what the action has changed.
+
+        Parameters
+        ----
+        state : (np.array, int)    board and player after the action
+        action : np.array    the location played, or PASS
+
+        Returns
+        ----
+        winner : None or int    see get_winner()
+        """
+        return self.get_winner(state)
 
     def step(self, action):
         """See gym.Env.step().
 
         Parameters
         ----
-        action : np.array    location
+        action : np.array or int    location, or encoded action in discrete action mode
 
         Returns
         ----
@@ -285,13 +733,222 @@ class BoardGameEnv(gym.Env):
         reward : float        the winner or zero
         termination : bool    whether the game end or not
         truncation : bool=False
-        info : dict={}
+        info : {'hash' : int}    the Zobrist hash of the next state, and
+            'action_mask' in discrete action mode
         """
-        state = (self.board, self.player)
+        action = self.parse_action(action)
+        state = GameState(self.board, self.player, self.key, self.move_count)
         next_state, reward, termination, info = self.next_step(state, action)
         self.board, self.player = next_state
+        self.key = info['hash']
+        self.move_count = getattr(next_state, 'move_count', self.move_count)
+        next_state = (readonly_view(self.board), self.player)
+        info = self.update_action_mask(next_state, info, termination)
         return next_state, reward, termination, False, info
 
+    def get_action_mask(self, state) -> np.array:
+        """Get the valid actions of a state in discrete action mode.
+
+        PASS is only included for games where players may pass by choice,
+        since other games pass automatically. RESIGN is not included,
+        although it is accepted.
+
+        Parameters
+        ----
+        state : tuple    the state
+
+        Returns
+        ----
+        mask : np.array    bool of shape (H * W + 2,), indexed by encode_action()
+        """
+        mask = np.zeros(self.board.size + 2, dtype=bool)
+        mask[:-2] = self.get_valid(state).ravel()
+        return mask
+
+    def parse_action(self, action):
+        """Decode an action of the action space.
+
+        In discrete action mode, the encoded action is decoded by the mask of
+        the current state, and actions out of the mask except RESIGN become
+        illegal_equivalent_action without checking the rules again.
+
+        Parameters
+        ----
+        action : np.array or int
+
+        Returns
+        ----
+        action : np.array    location, PASS or RESIGN
+        """
+        if self.action_mode != 'discrete':
+            return action
+        code = int(action)
+        if code == self.board.size + 1:
+            return self.RESIGN
+        if not 0 <= code <= self.board.size or not self.action_mask[code]:
+            return self.illegal_equivalent_action
+        return decode_action(code, self.board.shape)
+
+    def update_action_mask(self, state, info: dict, termination: bool=False) -> dict:
+        """Compute the action mask of a new state once, and put it into info.
+
+        Parameters
+        ----
+        state : tuple    the new state of the env
+        info : dict
+        termination : bool    whether the game has ended. The mask is empty if so.
+
+        Returns
+        ----
+        info : dict    with 'action_mask' in discrete action mode
+        """
+        if self.action_mode != 'discrete':
+            return info
+        if termination:
+            self.action_mask = np.zeros(self.board.size + 2, dtype=bool)
+        else:
+            self.action_mask = self.get_action_mask(state)
+        self.action_mask.flags.writeable = False
+        info['action_mask'] = self.action_mask
+        return info
+
+    def rollout(self, state, n: int=1, rng=None, max_length=None) -> np.array:
+        """Play uniformly random valid moves from a state until the games end.
+
+        Players pass only when they have no valid locations. Subclasses
+        override this with kernels for their rules.
+
+        Parameters
+        ----
+        state : tuple    the state to start from
+        n : int    number of playouts
+        rng : np.random.Generator, int or None    generator or seed
+        max_length : int or None    playouts are truncated after so many
+            moves, including passes. None means no limit.
+
+        Returns
+        ----
+        results : np.array    structured array of shape (n,) with dtype
+            ROLLOUT_DTYPE: the winner (EMPTY for draws and truncated
+            playouts), the number of moves, and whether it is truncated
+        """
+        rng = np.random.default_rng(rng)
+        results = np.zeros(n, dtype=ROLLOUT_DTYPE)
+        width = state[0].shape[1]
+        for result in results:
+            current, length = state, 0
+            while True:
+                winner = self.get_winner(current)
+                if winner is not None:
+                    result['winner'] = winner
+                    break
+                if max_length is not None and length >= max_length:
+                    result['truncated'] = True
+                    break
+                locations = np.flatnonzero(self.get_valid(current))
+                if len(locations):
+                    action = np.array(divmod(int(rng.choice(locations)), width))
+                else:
+                    action = self.PASS
+                current = self.get_next_state(current, action)
+                length += 1
+            result['length'] = length
+        return results
+
+    def enable_cache(self, max_bytes: int=2 ** 26):
+        """Memoize get_valid(), has_valid() and get_winner() by cache_key().
+
+        Cached arrays are shared and read-only.
+
+        Parameters
+        ----
+        max_bytes : int    memory budget of the cache. The least recently
+            used entries are evicted when it is exceeded.
+        """
+        self.disable_cache()
+        profiler = self._unwrap_profiled()
+        self.cache = LRUCache(max_bytes)
+        for name in self.CACHED_METHODS:
+            method = getattr(self, name)
+            setattr(self, name, self.cache.wrap(name, method, self.cache_key))
+        self._wrap_profiled(profiler)
+
+    def disable_cache(self):
+        """Stop memoizing and drop the cache."""
+        profiler = self._unwrap_profiled()
+        for name in self.CACHED_METHODS:
+            self.__dict__.pop(name, None)
+        self.cache = None
+        self._wrap_profiled(profiler)
+
+    def cache_info(self) -> dict:
+        """Get the statistics of the cache.
+
+        Returns
+        ----
+        info : dict or None    hits, misses, entries, bytes and max_bytes,
+            or None if the cache is not enabled
+        """
+        cache = getattr(self, 'cache', None)
+        return cache.info() if cache is not None else None
+
+    def enable_profiling(self, names=None):
+        """Count the calls of the hot methods and accumulate their wall time.
+
+        The methods are wrapped on the instance, so that the env runs at full
+        speed when profiling is disabled. Seconds include nested calls, e.g.
+        next_step() includes its is_valid(), get_winner() and has_valid().
+
+        Parameters
+        ----
+        names : sequence of str or None    names of the methods to profile.
+            None means PROFILED_METHODS.
+        """
+        self.disable_profiling()
+        self.profiled_methods = tuple(self.PROFILED_METHODS if names is None else names)
+        self._wrap_profiled(CallProfiler())
+
+    def disable_profiling(self):
+        """Stop profiling and drop the statistics."""
+        self._unwrap_profiled()
+
+    def stats(self) -> dict:
+        """Get the statistics of profiling.
+
+        Returns
+        ----
+        stats : dict or None    for every profiled method, a dict of 'calls',
+            'seconds' and 'mean_seconds', or None if profiling is not enabled
+        """
+        profiler = getattr(self, 'profiler', None)
+        return profiler.info() if profiler is not None else None
+
+    def reset_stats(self):
+        """Reset the statistics of profiling."""
+        profiler = getattr(self, 'profiler', None)
+        if profiler is not None:
+            profiler.clear()
+
+    def _wrap_profiled(self, profiler):
+        self.profiler = profiler
+        if profiler is None:
+            return
+        self.unprofiled = {name: self.__dict__.get(name) for name in self.profiled_methods}
+        for name in self.profiled_methods:
+            setattr(self, name, profiler.wrap(name, getattr(self, name)))
+
+    def _unwrap_profiled(self):
+        """Restore the methods, and return the profiler or None"""
+        profiler = getattr(self, 'profiler', None)
+        if profiler is not None:
+            for name, method in self.unprofiled.items():
+                if method is None:
+                    self.__dict__.pop(name, None)
+                else:
+                    setattr(self, name, method)
+            self.profiler = None
+        return profiler
+
     def render(self, mode='human'):
         """See gym.Env.render()."""
         outfile = StringIO() if mode == 'ansi' else sys.stdout
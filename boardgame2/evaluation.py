@@ -0,0 +1,171 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BatchEvaluator:
+
+    def __init__(self, evaluate, batch_size: int=64, timeout: float=0.001):
+        """Gather the leaf states of many concurrent searches into large batches.
+
+        Requests are queued, and a worker thread calls evaluate() when the
+        gathered states reach batch_size, or when timeout has passed since
+        the first request of the batch. The results are routed back to the
+        waiting requests. An instance can be used as the evaluate callback
+        of MCTS, with one search per thread.
+
+        Parameters
+        ----
+        evaluate : callable    evaluate(states) -> (policies, values), such as
+            the evaluate callback of MCTS. policies may be None.
+        batch_size : int    number of states that triggers an evaluation
+        timeout : float    seconds to wait for more requests
+        """
+        self.evaluate = evaluate
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.reset_stats()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, states) -> Future:
+        """Request the evaluation of states.
+
+        Parameters
+        ----
+        states : list of tuple
+
+        Returns
+        ----
+        future : concurrent.futures.Future    resolved to (policies, values)
+        """
+        if self.closed:
+            raise RuntimeError('evaluator is closed')
+        future = Future()
+        self.requests.put((list(states), future, time.perf_counter()))
+        return future
+
+    def __call__(self, states) -> tuple:
+        """Evaluate states, and block until the batch they are in is evaluated.
+
+        Parameters
+        ----
+        states : list of tuple
+
+        Returns
+        ----
+        policies : np.array or None
+        values : np.array
+        """
+        return self.submit(states).result()
+
+    async def evaluate_async(self, states) -> tuple:
+        """Evaluate states in asyncio.
+
+        Parameters
+        ----
+        states : list of tuple
+
+        Returns
+        ----
+        policies : np.array or None
+        values : np.array
+        """
+        return await asyncio.wrap_future(self.submit(states))
+
+    def stats(self) -> dict:
+        """Get the statistics since the last reset_stats().
+
+        Returns
+        ----
+        stats : dict
+            - 'requests', 'states', 'batches': counts
+            - 'mean_batch_size': states per evaluation
+            - 'mean_latency', 'max_latency': seconds from submitting to the result
+            - 'evaluate_seconds': seconds spent in evaluate()
+            - 'states_per_second': states evaluated per second of wall time
+        """
+        with self.lock:
+            stats = dict(self._stats)
+        batches, requests = stats['batches'], stats['requests']
+        seconds = time.perf_counter() - stats.pop('start')
+        stats['mean_batch_size'] = stats['states'] / batches if batches else 0.
+        stats['mean_latency'] = stats.pop('total_latency') / requests if requests else 0.
+        stats['states_per_second'] = stats['states'] / seconds if seconds else 0.
+        return stats
+
+    def reset_stats(self):
+        """Reset the statistics."""
+        with self.lock:
+            self._stats = {'requests': 0, 'states': 0, 'batches': 0, 'total_latency': 0.,
+                    'max_latency': 0., 'evaluate_seconds': 0., 'start': time.perf_counter()}
+
+    def close(self):
+        """Evaluate the queued requests, and stop the worker thread."""
+        if not self.closed:
+            self.closed = True
+            self.requests.put(None)
+            self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            request = self.requests.get()
+            if request is None:
+                break
+            batch = [request]
+            count = len(request[0])
+            deadline = time.perf_counter() + self.timeout
+            while count < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    request = self.requests.get(timeout=max(remaining, 0.)) \
+                            if remaining > 0 else self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                count += len(request[0])
+            self._evaluate_batch(batch)
+
+    def _evaluate_batch(self, batch: list):
+        states = [state for request in batch for state in request[0]]
+        tic = time.perf_counter()
+        try:
+            policies, values = self.evaluate(states)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        toc = time.perf_counter()
+
+        start = 0
+        latencies = []
+        for request_states, future, submitted in batch:
+            stop = start + len(request_states)
+            future.set_result((None if policies is None else policies[start:stop],
+                    values[start:stop]))
+            latencies.append(toc - submitted)
+            start = stop
+
+        with self.lock:
+            stats = self._stats
+            stats['requests'] += len(batch)
+            stats['states'] += len(states)
+            stats['batches'] += 1
+            stats['total_latency'] += sum(latencies)
+            stats['max_latency'] = max(stats['max_latency'], max(latencies))
+            stats['evaluate_seconds'] += toc - tic
@@ -0,0 +1,156 @@
+import collections
+
+import numpy as np
+import gym
+
+from .env import BLACK
+from .vector import get_valid_batch
+
+
+class FeatureBuilder:
+
+    def __init__(self, env, history_length: int=1, legal: bool=True, dtype=np.float32):
+        """Build AlphaZero-style input planes for batches of states.
+
+        The planes of a state are, in order:
+            - for each of the last history_length positions, most recent first:
+              the stones of the player to move, and the stones of the opponent;
+            - 1 everywhere if BLACK is to move, 0 otherwise;
+            - the valid locations, if legal is True.
+
+        Parameters
+        ----
+        env : BoardGameEnv    the env of the states
+        history_length : int    number of positions, including the current one
+        legal : bool    whether to add the plane of valid locations
+        dtype : np.dtype    dtype of the planes
+        """
+        if history_length < 1:
+            raise ValueError('history_length must be positive')
+        self.env = env.unwrapped
+        self.board_shape = self.env.board.shape
+        self.history_length = history_length
+        self.legal = legal
+        self.dtype = dtype
+        self.num_planes = 2 * history_length + 1 + int(legal)
+
+    def allocate(self, n: int) -> np.array:
+        """Allocate the output array for a batch.
+
+        Parameters
+        ----
+        n : int    batch size
+
+        Returns
+        ----
+        out : np.array    shape (n, num_planes, H, W)
+        """
+        return np.zeros((n, self.num_planes) + self.board_shape, dtype=self.dtype)
+
+    def build(self, states, histories=None, out=None) -> np.array:
+        """Build the planes of a batch of states.
+
+        Parameters
+        ----
+        states : tuple    batched components of the states, such as boards
+            of shape (N, H, W) and players of shape (N,)
+        histories : np.array or None    previous boards of shape
+            (N, history_length - 1, H, W), most recent first. Missing
+            positions should be EMPTY. None means no previous positions.
+        out : np.array or None    preallocated output made by allocate(),
+            which is overwritten
+
+        Returns
+        ----
+        planes : np.array    shape (N, num_planes, H, W)
+        """
+        boards, players = states[0], np.asarray(states[1])
+        if out is None:
+            out = self.allocate(len(boards))
+        k = self.history_length
+        own = players.reshape(-1, 1, 1)
+        np.equal(boards, own, out=out[:, 0], casting='unsafe')
+        np.equal(boards, -own, out=out[:, 1], casting='unsafe')
+        if k > 1:
+            if histories is None:
+                out[:, 2:2 * k] = 0
+            else:
+                own = own[:, np.newaxis]
+                np.equal(histories, own, out=out[:, 2:2 * k:2], casting='unsafe')
+                np.equal(histories, -own, out=out[:, 3:2 * k:2], casting='unsafe')
+        out[:, 2 * k] = (players == BLACK).reshape(-1, 1, 1)
+        if self.legal:
+            out[:, 2 * k + 1] = get_valid_batch(self.env, states)
+        return out
+
+    def build_one(self, state, history=()) -> np.array:
+        """Build the planes of one state.
+
+        Parameters
+        ----
+        state : tuple    a state of the env
+        history : sequence of np.array    previous boards, most recent first
+
+        Returns
+        ----
+        planes : np.array    shape (num_planes, H, W)
+        """
+        states = tuple(np.asarray(component)[np.newaxis] for component in state)
+        return self.build(states, self.stack_histories([history]))[0]
+
+    def stack_histories(self, histories) -> np.array:
+        """Stack lists of previous boards into the array used by build().
+
+        Parameters
+        ----
+        histories : sequence of sequences of np.array    previous boards of
+            every state, most recent first. Extra boards are ignored.
+
+        Returns
+        ----
+        histories : np.array or None    shape (N, history_length - 1, H, W)
+        """
+        if self.history_length == 1:
+            return None
+        stacked = np.zeros((len(histories), self.history_length - 1) + self.board_shape,
+                dtype=np.int8)
+        for i, history in enumerate(histories):
+            for t, board in enumerate(list(history)[:self.history_length - 1]):
+                stacked[i, t] = board
+        return stacked
+
+
+class FeatureEnv(gym.Wrapper):
+
+    def __init__(self, env, builder: FeatureBuilder):
+        """Put the planes of every observation into info['features'].
+
+        Observed boards are kept as the history without copying, since they
+        are read-only views. Steps follow the new step API.
+
+        Parameters
+        ----
+        env : BoardGameEnv    the env, or a gym wrapper of it
+        builder : FeatureBuilder
+        """
+        super().__init__(env, new_step_api=True)
+        self.builder = builder
+        self.history = collections.deque(maxlen=max(builder.history_length - 1, 1))
+
+    def reset(self, **kwargs):
+        """Reset the env. See gym.Env.reset()"""
+        self.history.clear()
+        observation, info = self.env.reset(**kwargs)
+        info = dict(info, features=self._build(observation))
+        return observation, info
+
+    def step(self, action):
+        """Step the env. See gym.Env.step()"""
+        observation, reward, termination, truncation, info = super().step(action)
+        info = dict(info, features=self._build(observation))
+        return observation, reward, termination, truncation, info
+
+    def _build(self, observation):
+        features = self.builder.build_one(observation, reversed(self.history))
+        self.history.append(observation[0])
+        return features
@@ -1,11 +1,12 @@
 import collections
+import functools
 
 import numpy as np
 import gym.spaces as spaces
 
-from .env import EMPTY, BLACK, WHITE
-from .env import BoardGameEnv
-from .env import is_index
+from .env import EMPTY, BLACK, WHITE, NO_CHANGE, ROLLOUT_DTYPE
+from .env import BoardGameEnv, GameState
+from .env import is_index, readonly_view
 
 
 class GoJudger:
@@ -22,64 +23,376 @@ class GoJudger:
         """
         Parameters
         ----
-        board : np.array
+        board : np.array, shape (H, W) or (N, H, W)
+
+        Returns
+        ----
+        winner : BLACK or WHITE, or np.array of them for a batch of boards
+        """
+        count_black, count_white = self.score(board)
+        return np.where(count_black > count_white + self.komi, BLACK, WHITE)[()]
+
+    def score(self, board: np.array):
+        """Count the areas by Tromp-Taylor rules.
+
+        A player's area consists of the player's stones and the empty
+        locations that reach only the player's stones. All stones are
+        treated as alive. The regions reached from the stones are grown by
+        dilation with array operations.
+
+        Parameters
+        ----
+        board : np.array, shape (H, W) or (N, H, W)
 
         Returns
         ----
-        winner : BLACK or WHITE
+        count_black : int or np.array    area of BLACK
+        count_white : int or np.array    area of WHITE
+        """
+        board = np.asarray(board)
+        empty = board == EMPTY
+        reaches = {}
+        for player in [BLACK, WHITE]:
+            reach = board == player
+            while True:
+                grown = reach.copy()
+                grown[..., 1:, :] |= reach[..., :-1, :]
+                grown[..., :-1, :] |= reach[..., 1:, :]
+                grown[..., :, 1:] |= reach[..., :, :-1]
+                grown[..., :, :-1] |= reach[..., :, 1:]
+                grown &= empty
+                grown |= reach
+                if np.array_equal(grown, reach):
+                    break
+                reach = grown
+            reaches[player] = reach
+        count_black = (reaches[BLACK] & ~reaches[WHITE]).sum(axis=(-2, -1))
+        count_white = (reaches[WHITE] & ~reaches[BLACK]).sum(axis=(-2, -1))
+        return count_black, count_white
+
+
+@functools.lru_cache(maxsize=None)
+def get_neighbors(board_shape) -> tuple:
+    """Get the flat indices of the 4 neighbors of every location.
+
+    Parameters
+    ----
+    board_shape : (int, int)
+
+    Returns
+    ----
+    neighbors : tuple of tuple of int
+    neighbor_bits : tuple of int    the neighbors of every location as a bitset
+    """
+    h, w = board_shape
+    neighbors = []
+    for x in range(h):
+        for y in range(w):
+            neighbors.append(tuple((x + dx) * w + y + dy
+                    for dx, dy in [(-1, 0), (0, -1), (1, 0), (0, 1)]
+                    if 0 <= x + dx < h and 0 <= y + dy < w))
+    neighbor_bits = tuple(sum(1 << n for n in ns) for ns in neighbors)
+    return tuple(neighbors), neighbor_bits
+
+
+def _iterate_bits(bits: int):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _count_bits(bits: int) -> int:
+    return bin(bits).count('1')
+
+
+class StoneGroups:
+
+    def __init__(self, board: np.array):
+        """Track the groups of connected stones on a board and their liberties.
+
+        Groups are kept in a union-find forest. The stones and the liberties
+        of every group are bitsets, so that placing a stone, capturing and
+        checking liberties do not search the board.
+
+        Parameters
+        ----
+        board : np.array    the tracked board. It is changed by place().
         """
+        self.neighbors, self.neighbor_bits = get_neighbors(board.shape)
+        self.rebind(board)
+        self.parent = [-1] * board.size
+        self.stones = {}
+        self.liberties = {}
+        self.empty = 0
+        for i, color in enumerate(self.colors):
+            if color == EMPTY:
+                self.empty |= 1 << i
+                continue
+            self.parent[i] = i
+            self.stones[i] = 1 << i
+            self.liberties[i] = 0
+            for n in self.neighbors[i]:
+                if n < i and self.colors[n] == color:  # the neighbors above and on the left
+                    self._union(self._find(n), self._find(i))
+        for i, color in enumerate(self.colors):
+            if color != EMPTY:
+                self.liberties[self._find(i)] |= self.neighbor_bits[i] & self.empty
+
+    def rebind(self, board: np.array):
+        """Track another board with the same stones, such as a copy."""
         self.board = board
+        self.cells = board.reshape(-1)
+        self.colors = self.cells.tolist()
+
+    def _find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]  # path halving
+            i = parent[i]
+        return i
+
+    def _union(self, a: int, b: int) -> int:
+        if a == b:
+            return a
+        if _count_bits(self.stones[a]) < _count_bits(self.stones[b]):  # union by size
+            a, b = b, a
+        self.parent[b] = a
+        self.stones[a] |= self.stones.pop(b)
+        self.liberties[a] |= self.liberties.pop(b)
+        return a
+
+    def _remove(self, root: int) -> int:
+        stones = self.stones.pop(root)
+        del self.liberties[root]
+        for i in _iterate_bits(stones):
+            self.parent[i] = -1
+            self.colors[i] = EMPTY
+            self.cells[i] = EMPTY
+        self.empty |= stones
+        for i in _iterate_bits(stones):
+            for n in self.neighbors[i]:
+                if self.colors[n] != EMPTY:
+                    self.liberties[self._find(n)] |= 1 << i
+        return stones
+
+    def count_liberties(self, index: int) -> int:
+        """Count the liberties of the group at a flat index.
+
+        Parameters
+        ----
+        index : int    flat index of a stone
+
+        Returns
+        ----
+        count : int
+        """
+        return _count_bits(self.liberties[self._find(index)])
 
-        self.remove_dead()
+    def is_valid(self, index: int, player: int, allow_suicide: bool=False) -> bool:
+        """Check whether a player can place a stone at an empty location.
 
-        # floodfill for both player
-        self.fill = np.zeros(board.shape + (3,), dtype=int)
-        for x in range(board.shape[0]):
-            for y in range(board.shape[1]):
-                self.floodfill((x, y), board[x, y])
+        Parameters
+        ----
+        index : int    flat index of an empty location, which is not a ko
+        player : int
+        allow_suicide : bool
 
-        count_black = np.nansum(self.fill[:, :, BLACK] > self.fill[:, :, WHITE])
-        count_white = np.nansum(self.fill[:, :, WHITE] > self.fill[:, :, BLACK])
-        if count_black > count_white + self.komi:
-            return BLACK
-        return WHITE
+        Returns
+        ----
+        valid : bool
+        """
+        bit = 1 << index
+        if allow_suicide or self.neighbor_bits[index] & self.empty:
+            return True
+        for n in self.neighbors[index]:
+            liberties = self.liberties[self._find(n)]
+            if self.colors[n] == player:
+                if liberties & ~bit:  # join a group with other liberties
+                    return True
+            elif liberties == bit:  # capture
+                return True
+        return False
+
+    def is_eye(self, index: int, player: int) -> bool:
+        """Check whether an empty location is a single-point eye of a player.
+
+        It is an eye if all its neighbors are the player's stones, and none
+        of their groups is in atari.
 
-    def remove_dead(self):
-        # TODO: The implmentation of dead stone removal is difficult.
-        print('The dead stone removal is not implemented. All stones will be treated as live ones.')
+        Parameters
+        ----
+        index : int    flat index of an empty location
+        player : int
 
-    def floodfill(self, location, player):
-        x, y = location
-        if not self.fill[x, y, player]:
-            self.fill[x, y, player] = 1
-            for dx, dy in [(-1, 0), (0, -1), (1, 0), (0, 1)]:
-                xx, yy = x + dx, y + dy
-                if is_index(self.board, (xx, yy)) and self.board[xx, yy] != -player:
-                    self.floodfill((xx, yy), player)
+        Returns
+        ----
+        eye : bool
+        """
+        for n in self.neighbors[index]:
+            if self.colors[n] != player or \
+                    _count_bits(self.liberties[self._find(n)]) == 1:
+                return False
+        return True
+
+    def place(self, index: int, player: int) -> tuple:
+        """Place a stone at an empty location, and remove the captured stones.
+
+        Parameters
+        ----
+        index : int    flat index of an empty location
+        player : int
+
+        Returns
+        ----
+        captures : int    bitset of the captured stones of the opponent
+        suicides : int    bitset of the own stones removed for having no liberty
+        """
+        bit = 1 << index
+        self.empty &= ~bit
+        self.colors[index] = player
+        self.cells[index] = player
+        self.parent[index] = root = index
+        self.stones[index] = bit
+        self.liberties[index] = self.neighbor_bits[index] & self.empty
+
+        captured = []
+        for n in self.neighbors[index]:
+            if self.colors[n] == EMPTY:
+                continue
+            group = self._find(n)
+            if self.colors[n] == player:
+                root = self._union(root, group)
+            else:
+                self.liberties[group] &= ~bit
+                if not self.liberties[group] and group not in captured:
+                    captured.append(group)
+        self.liberties[root] &= ~bit
+
+        captures = 0
+        for group in captured:
+            captures |= self._remove(group)
+        suicides = 0
+        if not self.liberties[root]:
+            suicides = self._remove(root)
+        return captures, suicides
+
+
+class GoState(GameState):
+
+    __slots__ = ('ko', 'pas')
+
+    def __init__(self, board: np.array, player: int, ko: int=-1, pas: int=0,
+            key=None, move_count: int=0):
+        """Create a compact Go state.
+
+        The state unpacks and indexes like the tuple (board, player, ko, pass),
+        where ko is materialized as a plane only when it is asked for.
+
+        Parameters
+        ----
+        board : np.array    int8 board
+        player : int    the player to move
+        ko : int    flat index of the location forbidden by ko, or -1 if none
+        pas : int    number of consecutive passes
+        key : int or None    cached Zobrist hash, or None if unknown
+        move_count : int    number of moves played, including passes
+        """
+        super().__init__(board, player, key, move_count)
+        self.ko = ko
+        self.pas = pas
+
+    def astuple(self) -> tuple:
+        """Get the tuple view of the state, which is used as gym observations."""
+        return self.board, self.player, get_ko_plane(self.board.shape, self.ko), self.pas
+
+    def __getitem__(self, index):
+        if index == 3:
+            return self.pas
+        return super().__getitem__(index)
+
+
+def get_ko(state) -> int:
+    """Get the ko location of a state.
+
+    Parameters
+    ----
+    state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
+
+    Returns
+    ----
+    ko : int    flat index of the location forbidden by ko, or -1 if none
+    """
+    if isinstance(state, GoState):
+        return state.ko
+    indices = np.flatnonzero(state[2])
+    return int(indices[0]) if indices.size else -1
+
+
+def set_ko(state, ko: int):
+    """Set the ko location of a state in place.
+
+    Parameters
+    ----
+    state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
+    ko : int    flat index of the location forbidden by ko, or -1 if none
+    """
+    if isinstance(state, GoState):
+        state.ko = ko
+        return
+    plane = state[2]
+    plane[...] = 0
+    if ko >= 0:
+        plane.flat[ko] = 1
+
+
+def get_ko_plane(board_shape, ko: int) -> np.array:
+    """Get the ko location as a plane.
+
+    Parameters
+    ----
+    board_shape : (int, int)
+    ko : int    flat index of the location forbidden by ko, or -1 if none
+
+    Returns
+    ----
+    plane : np.array    int8 plane that is 1 at the ko location
+    """
+    plane = np.zeros(board_shape, dtype=np.int8)
+    if ko >= 0:
+        plane.flat[ko] = 1
+    return plane
 
 
 class GoEnv(BoardGameEnv):
+
+    PROFILED_METHODS = BoardGameEnv.PROFILED_METHODS + ('get_groups', 'search')
+
     def __init__(self, board_shape=19, komi=0, allow_suicide: bool=False,
-            illegal_action_mode: str='pass', render_characters: str='+ox'):
+            illegal_action_mode: str='pass', render_characters: str='+ox',
+            action_mode: str='box'):
         super().__init__(board_shape=board_shape,
                 illegal_action_mode=illegal_action_mode,
-                render_characters=render_characters)
+                render_characters=render_characters, action_mode=action_mode)
         self.judger = GoJudger(komi)
         self.allow_suicide = allow_suicide
         obs_space = self.observation_space
         ko_space = spaces.Box(low=0, high=1, shape=obs_space.spaces[0].shape, dtype=np.int8)
-        pass_space = spaces.Discrete(2)
-        self.observation_space = spaces.Tuple(obs_space.spaces + [ko_space, pass_space])
-        print('Go is not fully implemented. Please use it at your own risk.')
+        pass_space = spaces.Discrete(3)  # number of consecutive passes
+        self.observation_space = spaces.Tuple(tuple(obs_space.spaces) + (ko_space, pass_space))
 
     def reset(self, *, seed=None, return_info=True, options=None):
         self.board = np.zeros_like(self.board, dtype=np.int8)
         self.player = BLACK
-        self.ko = np.zeros_like(self.board, dtype=np.int8)
-        self.pas = False  # record pass
-        next_state = (self.board, self.player, self.ko, self.pas)
+        self.ko = -1  # flat index of the location forbidden by ko
+        self.pas = 0  # number of consecutive passes
+        self.move_count = 0
+        self.groups = StoneGroups(self.board)
+        self.key = self.hash_state((self.board, self.player))
+        next_state = self.get_observation()
+        info = self.update_action_mask(next_state, {'hash': self.key})
         if return_info:
-            return next_state, {}
+            return next_state, info
         else:
             return next_state
 
@@ -87,47 +400,124 @@ class GoEnv(BoardGameEnv):
         """
         Parameters
         ----
-        state : (np.array, int, np.array, int)    board, player, ko, pass
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
         action : np.array   location
 
         Returns
         ----
         valid : bool
         """
-        board, _, ko, _ = state
+        board, player = state[0], state[1]
 
-        if is_index(board, action):
+        if not is_index(board, action):
             return False
 
         if len(action) == 1:
             action, = action
         x, y = action.tolist()
 
-        if board[x, y] or ko[x, y]:
+        if board[x, y] or x * board.shape[1] + y == get_ko(state):
             return False
 
+        groups = self.get_groups(board)
+        if groups is not None:
+            return groups.is_valid(x * board.shape[1] + y, player, self.allow_suicide)
+
         if not self.allow_suicide:
-            board[x, y] = self.player  # place
+            if not board.flags.writeable:
+                board = board.copy()
+            board[x, y] = player  # place
+            try:
+                for dx, dy in [(-1, 0), (0, -1), (1, 0), (0, 1)]:
+                    xx, yy = x + dx, y + dy
+                    if is_index(board, (xx, yy)):
+                        if board[xx, yy] == -player:
+                            _, liberties = self.search(board, (xx, yy), max_liberty=1)
+                            if not liberties:
+                                return True
+
+                _, my_liberties = self.search(board, (x, y), max_liberty=1)
+                if not my_liberties:
+                    return False
+            finally:
+                board[x, y] = EMPTY  # take back
 
-            for dx, dy in [(-1, 0), (0, -1), (1, 0), (0, 1)]:
-                xx, yy = x + dx, y + dy
-                if is_index(board, (xx, yy)):
-                    if board[xx, yy] == -self.player:
-                        _, liberties = self.search(board, (xx, yy), max_liberty=1)
-                        if not liberties:
-                            return True
+        return True
 
-            _, my_liberties = self.search(board, (x, y), max_liberty=1)
-            if not my_liberties:
-                return False
+    def cache_key(self, state):
+        """Get the key of a state in the cache of enable_cache().
 
-        return True
+        Parameters
+        ----
+        state : (np.array, int, np.array, int)    board, player, ko, pass
+
+        Returns
+        ----
+        key : (int, int, int)    the Zobrist hash, the ko location and the
+            number of consecutive passes
+        """
+        return self.hash_state(state), get_ko(state), state[3]
+
+    def get_groups(self, board):
+        """Get the stone groups tracked for a board.
+
+        Parameters
+        ----
+        board : np.array
+
+        Returns
+        ----
+        groups : StoneGroups or None    the groups if board is the board of the
+            current game, or a view of it
+        """
+        groups = getattr(self, 'groups', None)
+        if groups is not None and (groups.board is board or board.base is groups.board):
+            return groups
+        return None
+
+    def get_valid(self, state):
+        """
+        Parameters
+        ----
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
+
+        Returns
+        ----
+        valid : np.array     current valid place for the player
+        """
+        board, player = state[0], state[1]
+        groups = self.get_groups(board) or StoneGroups(board)
+        valid = (board == EMPTY).astype(np.int8)
+        ko = get_ko(state)
+        if ko >= 0:
+            valid.flat[ko] = 0
+        for index in np.flatnonzero(valid).tolist():
+            valid.flat[index] = groups.is_valid(index, player, self.allow_suicide)
+        return valid
+
+    def has_valid(self, state) -> bool:
+        """
+        Parameters
+        ----
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
+
+        Returns
+        ----
+        has_valid : bool
+        """
+        board, player = state[0], state[1]
+        groups = self.get_groups(board) or StoneGroups(board)
+        ko = get_ko(state)
+        for index in np.flatnonzero(board == EMPTY).tolist():
+            if index != ko and groups.is_valid(index, player, self.allow_suicide):
+                return True
+        return False
 
     def get_winner(self, state):
         """
         Parameters
         ----
-        state : (np.array, int, np.array, int)    board, player, ko, pass
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
 
         Returns
         ----
@@ -135,13 +525,135 @@ class GoEnv(BoardGameEnv):
             - None   if the game is not ended and the winner is not determined
             - int    the winner
         """
-        print('End game is not implemented.')
-        end_game = False
-        if end_game:
-            winner = self.judger(self.board)
-            return winner
-        else:
-            return None
+        if state[3] >= 2:  # both players pass
+            return self.judger(state[0])
+        return None
+
+    def get_all_next_states(self, state) -> tuple:
+        """Get the next states of all valid actions of a state at once.
+
+        The groups of the board are found once, and the captures, suicides
+        and ko of every valid location are read from the groups of its
+        neighbors. PASS is included if pass is allowed or no location is
+        valid. See BoardGameEnv.get_all_next_states().
+
+        Parameters
+        ----
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
+
+        Returns
+        ----
+        codes : np.array    the valid actions encoded by encode_action(), of shape (K,)
+        next_states : tuple    batched components of the next states: boards
+            of shape (K, H, W), players of shape (K,), ko planes of shape
+            (K, H, W) and passes of shape (K,)
+        """
+        board, player, pas = state[0], state[1], state[3]
+        groups = self.get_groups(board) or StoneGroups(board)
+        ko = get_ko(state)
+        codes, kos = [], []
+        removed_rows, removed = [], []  # captured and suicided stones of every action
+        for index in np.flatnonzero(board == EMPTY).tolist():
+            if index == ko or not groups.is_valid(index, player, self.allow_suicide):
+                continue
+            bit = 1 << index
+            captures, stones = 0, bit
+            liberties = groups.neighbor_bits[index] & groups.empty
+            for n in groups.neighbors[index]:
+                color = groups.colors[n]
+                if color == EMPTY:
+                    continue
+                root = groups._find(n)
+                if color == player:
+                    stones |= groups.stones[root]
+                    liberties |= groups.liberties[root]
+                elif groups.liberties[root] == bit:
+                    captures |= groups.stones[root]
+            liberties &= ~bit
+            if not captures and not liberties:  # suicide
+                captures = stones
+            elif stones == bit and _count_bits(captures) == 1 \
+                    and not groups.neighbor_bits[index] & groups.empty:
+                kos.append((len(codes), captures.bit_length() - 1))
+            for i in _iterate_bits(captures):
+                removed_rows.append(len(codes))
+                removed.append(i)
+            codes.append(index)
+        passing = self.allow_pass or not codes
+        count = len(codes) + int(passing)
+
+        boards = np.repeat(np.asarray(board, dtype=np.int8)[np.newaxis], count, axis=0)
+        cells = boards.reshape(count, -1)
+        codes = np.array(codes, dtype=int)
+        cells[np.arange(len(codes)), codes] = player
+        cells[np.array(removed_rows, dtype=int), np.array(removed, dtype=int)] = EMPTY
+        ko_planes = np.zeros_like(boards)
+        if kos:
+            ko_planes.reshape(count, -1)[tuple(zip(*kos))] = 1
+        passes = np.zeros(count, dtype=np.int8)
+        if passing:
+            codes = np.append(codes, board.size)
+            passes[-1] = min(pas + 1, 2)
+        players = np.full(count, -player, dtype=np.int8)
+        return codes, (boards, players, ko_planes, passes)
+
+    def rollout(self, state, n: int=1, rng=None, max_length=None) -> np.array:
+        """Play uniformly random valid moves from a state until both players pass.
+
+        Stones are placed on a board tracked by StoneGroups, and a move is
+        the first valid location in a random order of the empty locations
+        that does not fill the player's own eye (see StoneGroups.is_eye()).
+        Players pass only when no other locations remain. Playouts are
+        truncated after 4 * H * W moves by default, in case they repeat
+        positions. See BoardGameEnv.rollout().
+
+        Parameters
+        ----
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
+        n : int    number of playouts
+        rng : np.random.Generator, int or None    generator or seed
+        max_length : int or None    playouts are truncated after so many
+            moves, including passes. None means 4 * H * W.
+
+        Returns
+        ----
+        results : np.array    structured array with dtype ROLLOUT_DTYPE
+        """
+        rng = np.random.default_rng(rng)
+        results = np.zeros(n, dtype=ROLLOUT_DTYPE)
+        initial_board = np.array(state[0], dtype=np.int8)
+        if max_length is None:
+            max_length = 4 * initial_board.size
+        board = np.empty_like(initial_board)
+        for result in results:
+            np.copyto(board, initial_board)
+            groups = StoneGroups(board)
+            player, ko, pas, length = state[1], get_ko(state), state[3], 0
+            while pas < 2 and length < max_length:
+                index = -1
+                for i in rng.permutation(np.flatnonzero(board == EMPTY)).tolist():
+                    if i != ko and not groups.is_eye(i, player) and \
+                            groups.is_valid(i, player, self.allow_suicide):
+                        index = i
+                        break
+                ko = -1
+                if index < 0:
+                    pas += 1
+                else:
+                    captures, suicides = groups.place(index, player)
+                    if _count_bits(captures) == 1 and not suicides and \
+                            groups.stones[groups._find(index)] == 1 << index and \
+                            groups.count_liberties(index) == 1:
+                        ko = captures.bit_length() - 1
+                    pas = 0
+                player = -player
+                length += 1
+            if pas >= 2:
+                result['winner'] = self.judger(board)
+            else:
+                result['truncated'] = True
+            result['length'] = length
+        return results
 
     def search(self, board, location, max_liberty=float('+inf'), max_stone=float('+inf')):
         # BFS
@@ -171,79 +683,217 @@ class GoEnv(BoardGameEnv):
         """
         Parameters
         ----
-        state : (np.array, int, np.array, int)        board, player, ko, pass
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
         action : np.array    location
 
         Returns
         ----
-        next_state : (np.array, int)    next board and next player, next_ko, next_pass
+        next_state : GoState    next board, next player, next ko and next pass
         """
-        board, player, _, _ = state
-        location = action
-
-        ko, pas = np.zeros_like(board), True
-        if self.is_valid(state, action):
-            pas = False
+        board, player, pas = state[0], state[1], state[3]
+        next_state = GoState(board.copy(), player, get_ko(state),
+                move_count=getattr(state, 'move_count', 0) + 1)
+        key = getattr(state, 'key', None)
+        undo = self.make_move(next_state, action)
+        if key is not None:
+            next_state.key = self.update_hash(key, next_state, undo)
+        next_state.player = -player
+        next_state.pas = 0 if len(undo[0]) else min(pas + 1, 2)
+        return next_state
+
+    def make_move(self, state, action):
+        """
+        Parameters
+        ----
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass.
+            The board and ko are changed.
+        action : np.array    location
 
-            x, y = location
+        Returns
+        ----
+        undo : (np.array, np.array, int)    flat indices of changed locations,
+            their previous values, and the previous ko
+        """
+        board, player = state[0], state[1]
+        if isinstance(state, GameState):
+            state.key = None
+        previous_ko = get_ko(state)
+        valid = self.is_valid(state, action)
+        set_ko(state, -1)
+        if not valid:
+            return NO_CHANGE + (previous_ko,)
+
+        x, y = action
+        index = int(x * board.shape[1] + y)
+        groups = self.get_groups(board)
+        if groups is not None:
+            captures, suicides = groups.place(index, player)
+            lone = not suicides and groups.stones[groups._find(index)] == 1 << index \
+                    and groups.count_liberties(index) == 1
+            captures = list(_iterate_bits(captures))
+            suicides = [i for i in _iterate_bits(suicides) if i != index]
+        else:
             board[x, y] = player  # place
 
-            suicides, my_liberties = self.search(board, (x, y), max_liberty=1)
-
-            delete_count = 0
+            captures = []
             for dx, dy in [(-1, 0), (0, -1), (1, 0), (0, 1)]:
                 xx, yy = x + dx, y + dy
-                if is_index(board, (xx, yy)):
-                    if board[xx, yy] == player:
-                        deletes, liberties = self.search(board, (xx, yy), max_liberty=1)
-                        if not liberties:
-                            delete_count += len(deletes)
-                            for x_del, y_del in deletes:
-                                board[x_del, y_del] = 0
-                            if delete_count == 1:
-                                ko[x_del, y_del] = 1
-
-            if not my_liberties:
-                if delete_count != 1 and len(suicides) != 1:
-                    ko = np.zeros_like(board)
-      
-                if self.allow_suicide:
-                    for x_del, y_del in suicides:
-                        board[x_del, y_del] = 0
-
-        return board, -player, ko, pas
+                if is_index(board, (xx, yy)) and board[xx, yy] == -player:
+                    deletes, liberties = self.search(board, (xx, yy), max_liberty=1)
+                    if not liberties:
+                        for x_del, y_del in deletes:
+                            board[x_del, y_del] = EMPTY
+                            captures.append(x_del * board.shape[1] + y_del)
+
+            suicides = []
+            stones, my_liberties = self.search(board, (x, y), max_liberty=2)
+            lone = len(stones) == 1 and len(my_liberties) == 1
+            if not my_liberties:  # only when suicide is allowed
+                for x_del, y_del in stones:
+                    board[x_del, y_del] = EMPTY
+                    if (x_del, y_del) != (x, y):
+                        suicides.append(x_del * board.shape[1] + y_del)
+
+        if len(captures) == 1 and lone:
+            set_ko(state, captures[0])  # the captured stone can not be retaken at once
+
+        indices = np.array(captures + suicides + [index])
+        previous = np.array([-player] * len(captures) + [player] * len(suicides) + [EMPTY],
+                dtype=np.int8)
+        return indices, previous, previous_ko
+
+    def unmake_move(self, state, undo):
+        """
+        Parameters
+        ----
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
+            after the action. The board and ko are changed.
+        undo : tuple    returned by make_move()
+        """
+        board = state[0]
+        indices, previous, previous_ko = undo
+        board.flat[indices] = previous
+        set_ko(state, previous_ko)
+        if isinstance(state, GameState):
+            state.key = None
+        if self.get_groups(board) is not None:
+            self.groups = StoneGroups(board)
+
+    def _check_action(self, state, action):
+        """Replace an invalid action by illegal_equivalent_action. PASS is valid if allowed."""
+        passing = self.allow_pass and np.array_equal(action, self.PASS)
+        if not passing and not self.is_valid(state, action):
+            return self.illegal_equivalent_action
+        return action
+
+    def next_step(self, state, action, key=None):
+        """Get the next state, reward, termination, and info.
+
+        Like step(), a player without valid locations passes. See
+        BoardGameEnv.next_step().
+
+        Parameters
+        ----
+        state : GoState or (np.array, int, np.array, int)    board, player, ko, pass
+        action : np.array    location, PASS or RESIGN
+        key : int or None    the Zobrist hash of state. If given or cached in
+            state, the hash of the next state is updated incrementally and put
+            into info['hash'].
+
+        Returns
+        ----
+        next_state : GoState    next board, next player, next ko and next pass
+        reward : float    the winner or zero
+        termination : bool    whether the game ends
+        info : {'hash' : int}    the hash of the next state, if known
+        """
+        if key is None:
+            key = getattr(state, 'key', None)
+        info = {} if key is None else {'hash': key}
+        state = GoState(state[0], state[1], get_ko(state), state[3], key,
+                getattr(state, 'move_count', 0))
+        action = self._check_action(state, action)
+        if np.array_equal(action, self.RESIGN):
+            return state, -state.player, True, info
+        while True:
+            state = self.get_next_state(state, action)
+            if key is not None:
+                info['hash'] = state.key
+            winner = self.get_winner(state)
+            if winner is not None:
+                return state, winner, True, info
+            if self.has_valid(state):
+                return state, 0., False, info
+            action = self.PASS
 
     def step(self, action):
         """
         Parameters
         ----
-        action : np.array    location
+        action : np.array or int    location, or encoded action in discrete action mode
 
         Returns
         ----
-        next_state : (np.array, int, np.array, bool)    next board and next player
+        next_state : (np.array, int, np.array, int)    next board, next player, ko and passes
         reward : float               the winner or zeros
-        done : bool                  whether the game end or not
-        info : {}
+        termination : bool           whether the game end or not
+        truncation : bool=False
+        info : {'hash' : int}    and 'action_mask' in discrete action mode
         """
-        state = (self.board, self.player, self.ko, self.pas)
-        if not self.is_valid(state, action):
-            action = self.illegal_equivalent_action
+        if self.action_mode == 'discrete':
+            action = self.parse_action(action)  # checked by the action mask
+        else:
+            state = GoState(self.board, self.player, self.ko, self.pas, self.key,
+                    self.move_count)
+            action = self._check_action(state, action)
 
         if np.array_equal(action, self.RESIGN):
             self.player = -self.player
-            next_state = self.board, self.player, np.zeros_like(self.board), False
-            return next_state, self.player, True, {}
+            next_state = tuple(GoState(readonly_view(self.board), self.player))
+            info = self.update_action_mask(next_state, {'hash': self.key}, True)
+            return next_state, self.player, True, False, info
 
-        self.board, self.player, self.ko, self.pas = self.get_next_state(
-                (self.board, self.player, self.ko, self.pas), action)
+        self.play(action)
         while True:
-            winner = self.get_winner(self.board)
+            state = GoState(self.board, self.player, self.ko, self.pas, self.key,
+                    self.move_count)
+            winner = self.get_winner(state)
             if winner is not None:
-                return (self.board, self.player, self.ko, self.pas), winner, True, {}
-            state = (self.board, self.player, self.ko, self.pas)
+                info = self.update_action_mask(state, {'hash': self.key}, True)
+                return self.get_observation(), winner, True, False, info
             if self.has_valid(state):
                 break
-            self.board, self.player, self.ko, self.pas = self.get_next_state(
-                    state, self.PASS)
-        return (self.board, self.player, self.ko, self.pas), 0., False, {}
+            self.play(self.PASS)
+        info = self.update_action_mask(state, {'hash': self.key})
+        return self.get_observation(), 0., False, False, info
+
+    def get_action_mask(self, state) -> np.array:
+        """Get the valid actions of a state in discrete action mode, where
+        PASS is valid if pass is allowed. See BoardGameEnv.get_action_mask()
+        """
+        mask = super().get_action_mask(state)
+        mask[-2] = self.allow_pass
+        return mask
+
+    def get_observation(self) -> tuple:
+        """Get the observation of the current game.
+
+        Returns
+        ----
+        observation : (np.array, int, np.array, int)    read-only view of the
+            board, player, ko and pass
+        """
+        state = GoState(readonly_view(self.board), self.player, self.ko, self.pas)
+        return tuple(state)
+
+    def play(self, action):
+        """Play an action in the current game, and update the Zobrist hash."""
+        self.board = self.board.copy()
+        self.groups.rebind(self.board)
+        state = GoState(self.board, self.player, self.ko, self.pas)
+        undo = self.make_move(state, action)
+        self.key = self.update_hash(self.key, state, undo)
+        self.ko = state.ko
+        self.player = -self.player
+        self.pas = 0 if len(undo[0]) else min(self.pas + 1, 2)
+        self.move_count += 1
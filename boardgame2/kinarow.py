@@ -1,24 +1,62 @@
-import itertools
+import functools
 
-from .env import BLACK, WHITE
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from .env import EMPTY, BLACK, WHITE, ROLLOUT_DTYPE
 from .env import BoardGameEnv
 from .env import is_index
 
 
+@functools.lru_cache(maxsize=None)
+def get_line_table(board_shape, target_length: int) -> np.array:
+    """Get all windows of target_length locations along the 4 directions.
+
+    Parameters
+    ----
+    board_shape : (int, int)
+    target_length : int
+
+    Returns
+    ----
+    table : np.array    read-only array of shape (M, target_length), whose
+        rows are the flat indices of the locations of the windows
+    """
+    h, w = board_shape
+    steps = np.arange(target_length)
+    lines = []
+    for dx, dy in [(1, -1), (1, 0), (1, 1), (0, 1)]:  # loop on the 4 directions
+        for x in range(h):
+            for y in range(w):
+                xx, yy = x + steps * dx, y + steps * dy
+                if xx[-1] < h and 0 <= yy[-1] < w:
+                    lines.append(xx * w + yy)
+    table = np.array(lines, dtype=np.intp).reshape(-1, target_length)
+    table.flags.writeable = False
+    return table
+
+
 class KInARowEnv(BoardGameEnv):
 
+    VALID_IS_EMPTY = True
+    AUTO_PASS = False  # an empty location is always valid, and a full board ends the game
+
     def __init__(self, board_shape=3, target_length: int=3,
-            illegal_action_mode: str='pass', render_characters: str='+ox'):
+            illegal_action_mode: str='pass', render_characters: str='+ox',
+            action_mode: str='box'):
         super().__init__(board_shape=board_shape,
                 illegal_action_mode=illegal_action_mode,
-                render_characters=render_characters)
+                render_characters=render_characters, action_mode=action_mode)
         self.target_length = target_length
 
-    def get_winner(self, state):
+    def get_winner(self, state, action=None):
         """
         Parameters
         ----
         state : (np.array, int)   board and player. player info is not used
+        action : np.array or None    the location of the last placed stone
+            - None      examine the whole board
+            - location  only examine the 4 lines through the location
 
         Returns
         ----
@@ -26,19 +64,127 @@ class KInARowEnv(BoardGameEnv):
             - None   if the game is not ended and the winner is not determined
             - int    the winner
         """
-        board, _ = state
-        for player in [BLACK, WHITE]:
-            for x in range(board.shape[0]):
-                for y in range(board.shape[1]):
-                    for dx, dy in [(1, -1), (1, 0), (1, 1), (0, 1)]:  # loop on the 8 directions
-                        xx, yy = x, y
-                        for count in itertools.count():
-                            if not is_index(board, (xx, yy)) or board[xx, yy] != player:
-                                break
-                            xx, yy = xx + dx, yy + dy
-                        if count >= self.target_length:
-                            return player
-        for player in [BLACK, WHITE]:
-            if self.has_valid((board, player)):
+        board = state[0]
+        if action is not None and is_index(board, action) and \
+                board.item(action[0], action[1]) != EMPTY:
+            x, y = int(action[0]), int(action[1])
+            h, w = board.shape
+            item = board.item  # Python scalars are cheaper to compare
+            player = item(x, y)
+            for dx, dy in [(1, -1), (1, 0), (1, 1), (0, 1)]:  # loop on the 4 lines
+                count = 1
+                for sign in [1, -1]:  # extend the line both ways
+                    xx, yy = x + sign * dx, y + sign * dy
+                    while count < self.target_length and 0 <= xx < h and 0 <= yy < w \
+                            and item(xx, yy) == player:
+                        count += 1
+                        xx, yy = xx + sign * dx, yy + sign * dy
+                if count >= self.target_length:
+                    return player
+            if np.count_nonzero(board) < board.size:  # some location is EMPTY
                 return None
-        return 0
+            return 0
+        winner = self.get_winner_batch(board[np.newaxis])[0]
+        if np.isnan(winner):
+            return None
+        return int(winner)
+
+    def get_winner_batch(self, boards: np.array) -> np.array:
+        """Check whether a batch of games have ended. If so, who are the winners.
+
+        The stones of every window of target_length locations along the 4
+        directions are summed through strided views of the boards.
+
+        Parameters
+        ----
+        boards : np.array, shape (N, H, W)
+
+        Returns
+        ----
+        winners : np.array, shape (N,)
+            - np.nan  if the game is not ended and the winner is not determined
+            - float   the winner
+        """
+        boards = np.asarray(boards)
+        n, h, w = boards.shape
+        k = self.target_length
+        sn, sh, sw = boards.strides
+        black = np.zeros(n, dtype=bool)
+        white = np.zeros(n, dtype=bool)
+        for dx, dy in [(1, -1), (1, 0), (1, 1), (0, 1)]:  # loop on the 4 directions
+            rows, cols = h - (k - 1) * dx, w - (k - 1) * abs(dy)
+            if rows <= 0 or cols <= 0:
+                continue
+            start = boards[:, :, (k - 1) if dy < 0 else 0:]
+            windows = as_strided(start, shape=(n, rows, cols, k),
+                    strides=(sn, sh, sw, dx * sh + dy * sw), writeable=False)
+            sums = windows.sum(axis=-1)
+            black |= (sums == k * BLACK).any(axis=(1, 2))
+            white |= (sums == k * WHITE).any(axis=(1, 2))
+        winners = np.where((boards == EMPTY).any(axis=(1, 2)), np.nan, 0.)
+        winners[white] = WHITE
+        winners[black] = BLACK
+        return winners
+
+    def rollout(self, state, n: int=1, rng=None, max_length=None,
+            batch_size: int=256) -> np.array:
+        """Play uniformly random valid moves from a state until the games end.
+
+        A playout is a random order of the empty locations. Every playout is
+        filled up at once, and it ends at the first window of target_length
+        stones of one player to be completed. See BoardGameEnv.rollout().
+
+        Parameters
+        ----
+        state : (np.array, int)    board and player
+        n : int    number of playouts
+        rng : np.random.Generator, int or None    generator or seed
+        max_length : int or None    playouts are truncated after so many moves
+        batch_size : int    number of playouts filled together
+
+        Returns
+        ----
+        results : np.array    structured array with dtype ROLLOUT_DTYPE
+        """
+        rng = np.random.default_rng(rng)
+        results = np.zeros(n, dtype=ROLLOUT_DTYPE)
+        board, player = state[0], state[1]
+        winner = self.get_winner((board, player))
+        if winner is not None:
+            results['winner'] = winner
+            return results
+
+        empties = np.flatnonzero(board == EMPTY)
+        num_moves = len(empties)
+        lines = get_line_table(board.shape, self.target_length)
+        stones = np.where(np.arange(num_moves) % 2, -player, player).astype(np.int8)
+        colors = np.empty((batch_size, board.size), dtype=np.int8)  # final boards
+        times = np.full((batch_size, board.size), -1, dtype=np.int32)  # when placed
+        for start in range(0, n, batch_size):
+            m = min(batch_size, n - start)
+            orders = rng.permuted(np.broadcast_to(empties, (m, num_moves)), axis=1)
+            rows = np.arange(m)[:, np.newaxis]
+            colors[:m] = board.ravel()
+            colors[rows, orders] = stones
+            times[rows, orders] = np.arange(num_moves)
+            sums = colors[:m][:, lines].sum(axis=-1)
+            ends = np.where(np.abs(sums) == self.target_length,
+                    times[:m][:, lines].max(axis=-1), num_moves)
+            firsts = ends.argmin(axis=-1)
+            lengths = ends[rows[:, 0], firsts] + 1
+            ended = lengths <= num_moves
+            batch = results[start:start + m]
+            batch['winner'] = np.where(ended, np.sign(sums[rows[:, 0], firsts]), EMPTY)
+            batch['length'] = np.minimum(lengths, num_moves)
+        if max_length is not None:
+            truncated = results['length'] > max_length
+            results['truncated'] = truncated
+            results['winner'][truncated] = EMPTY
+            results['length'][truncated] = max_length
+        return results
+
+    def get_next_winner(self, state, action):
+        """Only the lines through the placed stone are examined. See
+        BoardGameEnv.get_next_winner()
+        """
+        return self.get_winner(state, action)
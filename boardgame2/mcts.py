@@ -0,0 +1,360 @@
+import math
+
+import numpy as np
+
+from .env import encode_action, decode_action
+from .kinarow import KInARowEnv
+
+
+class RolloutEvaluator:
+
+    def __init__(self, env, rng=None):
+        """Evaluate states by random playouts, with uniform priors.
+
+        Parameters
+        ----
+        env : BoardGameEnv
+        rng : np.random.Generator or None
+        """
+        self.env = env.unwrapped
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.num_actions = self.env.board.size + 1
+
+    def __call__(self, states) -> tuple:
+        """
+        Parameters
+        ----
+        states : list of tuple
+
+        Returns
+        ----
+        policies : None    uniform priors
+        values : np.array    results of the playouts, from the view of the players to move
+        """
+        values = np.array([self.rollout(state) * state[1] for state in states], dtype=float)
+        return None, values
+
+    def rollout(self, state) -> int:
+        """Play random valid actions until the game ends. See env.rollout().
+
+        Returns
+        ----
+        winner : int    EMPTY for draws and truncated games
+        """
+        return int(self.env.rollout(state, 1, self.rng)['winner'][0])
+
+
+class MCTS:
+
+    NODE_FIELDS = ('parent', 'action', 'mover', 'prior', 'visits', 'value_sum', 'q',
+            'first_child', 'num_children', 'winner')
+
+    def __init__(self, env, evaluate=None, selection: str='puct', c: float=1.5,
+            virtual_loss: float=1., batch_size: int=1, capacity: int=1024):
+        """Monte Carlo tree search on the dynamics of a board game env.
+
+        Nodes are kept in lists, one entry per node, and the children of a
+        node are contiguous. The value of a node is from the view of the
+        player who moved into it. Selection and backup visit the nodes one
+        by one with Python scalars, which is much cheaper than numpy calls
+        on the few children of a node.
+
+        Parameters
+        ----
+        env : BoardGameEnv
+        evaluate : callable or None    evaluate(states) -> (policies, values)
+            for a list of leaf states. policies has shape (N, H * W + 1),
+            where the last entry is PASS, or is None for uniform priors.
+            values has shape (N,), from the view of the players to move.
+            None means RolloutEvaluator(env).
+        selection : str
+            - 'puct': Q + c * P * sqrt(N_parent) / (1 + N)
+            - 'uct':  Q + c * sqrt(log(N_parent) / N)
+        c : float    exploration constant
+        virtual_loss : float    loss added to the nodes on the paths that wait
+            for evaluation, so that a batch spreads over different leaves.
+            The pending evaluations are counted as visits meanwhile.
+        batch_size : int    number of leaves evaluated together
+        capacity : int    initial number of nodes. The lists grow when full.
+        """
+        if selection not in ['puct', 'uct']:
+            raise ValueError('unknown selection {}'.format(selection))
+        self.env = env.unwrapped
+        self.board_shape = self.env.board.shape
+        self.num_actions = self.env.board.size + 1
+        self.evaluate = RolloutEvaluator(self.env) if evaluate is None else evaluate
+        self.selection = selection
+        self.c = c
+        self.virtual_loss = virtual_loss
+        self.batch_size = batch_size
+        self.incremental_winner = isinstance(self.env, KInARowEnv)
+
+        self.parent = [-1] * capacity
+        self.action = [-1] * capacity  # encoded action into the node
+        self.mover = [0] * capacity  # player who moved into the node
+        self.prior = [0.] * capacity
+        self.visits = [0] * capacity  # including pending evaluations
+        self.value_sum = [0.] * capacity  # including virtual losses
+        self.q = [0.] * capacity  # value_sum / visits, or 0
+        self.first_child = [-1] * capacity
+        self.num_children = [-1] * capacity  # -1 if not expanded
+        self.winner = [None] * capacity  # None if not ended or not known
+        self.states = [None] * capacity  # None until the node is selected
+        self.next_states = [None] * capacity  # batched states of the children, by get_all_next_states()
+        self.size = 0
+        self.root = -1
+
+    def reset(self, state):
+        """Discard the tree and search from a state.
+
+        Parameters
+        ----
+        state : tuple    the root state
+        """
+        self.size = 0
+        self.root = self._allocate(1)
+        self.mover[self.root] = -state[1]
+        self.prior[self.root] = 1.
+        self.states[self.root] = state
+
+    def search(self, num_simulations: int) -> np.array:
+        """Run simulations from the root.
+
+        Parameters
+        ----
+        num_simulations : int
+
+        Returns
+        ----
+        policy : np.array    visit counts of the root children, normalized,
+            of shape (H * W + 1,)
+        """
+        visits, value_sum, q = self.visits, self.value_sum, self.q
+        pending = []
+        for _ in range(num_simulations):
+            path = self._select()
+            leaf = path[-1]
+            winner = self.winner[leaf]
+            if winner is None and self.num_children[leaf] < 0:
+                winner = self._get_winner(leaf)
+                if winner is not None:
+                    winner = self.winner[leaf] = float(winner)
+                    self.num_children[leaf] = 0
+            if winner is not None:
+                self._backup(path, winner)
+                continue
+            if self.batch_size == 1:  # no other path waits, so no virtual loss
+                self._evaluate([path], virtual_loss=False)
+                continue
+            for node in path:  # virtual loss
+                n = visits[node] = visits[node] + 1
+                total = value_sum[node] = value_sum[node] - self.virtual_loss
+                q[node] = total / n
+            pending.append(path)
+            if len(pending) >= self.batch_size:
+                self._evaluate(pending)
+                pending = []
+        if pending:
+            self._evaluate(pending)
+        return self.get_policy()
+
+    def get_policy(self, temperature: float=1.) -> np.array:
+        """Get the policy of the root by the visit counts.
+
+        Parameters
+        ----
+        temperature : float    0 puts all the probability on the most visited action
+
+        Returns
+        ----
+        policy : np.array    shape (H * W + 1,), where the last entry is PASS
+        """
+        policy = np.zeros(self.num_actions)
+        children = self._children(self.root)
+        if not len(children):
+            return policy
+        visits = np.array(self.visits[children.start:children.stop], dtype=float)
+        if temperature == 0:
+            weights = (visits == visits.max()).astype(float)
+        else:
+            weights = visits ** (1. / temperature)
+        if weights.sum() == 0:
+            weights = np.ones_like(weights)
+        policy[self.action[children.start:children.stop]] = weights / weights.sum()
+        return policy
+
+    def get_value(self) -> float:
+        """Get the mean value of the root, from the view of the player to move."""
+        root = self.root
+        if not self.visits[root]:
+            return 0.
+        return -self.value_sum[root] / self.visits[root]
+
+    def select_action(self, temperature: float=0., rng=None) -> np.array:
+        """Choose an action at the root by the visit counts.
+
+        Parameters
+        ----
+        temperature : float
+        rng : np.random.Generator or None
+
+        Returns
+        ----
+        action : np.array    location or PASS
+        """
+        policy = self.get_policy(temperature)
+        if temperature == 0:
+            code = int(np.argmax(policy))
+        else:
+            rng = np.random.default_rng() if rng is None else rng
+            code = int(rng.choice(self.num_actions, p=policy))
+        return decode_action(code, self.board_shape)
+
+    def advance(self, action):
+        """Move the root to the child of an action, and keep its subtree.
+
+        Parameters
+        ----
+        action : np.array    location or PASS
+        """
+        code = encode_action(action, self.board_shape)
+        for child in self._children(self.root):
+            if self.action[child] == code:
+                self._get_state(child)
+                self._compact(child)
+                return
+        next_state = self.env.get_next_state(self.states[self.root], action)
+        self.reset(next_state)
+
+    def _allocate(self, n: int) -> int:
+        start = self.size
+        end = start + n
+        if end > len(self.parent):
+            grow = max(len(self.parent), end - len(self.parent))
+            for name in self.NODE_FIELDS + ('states', 'next_states'):
+                getattr(self, name).extend([None] * grow)
+        self.parent[start:end] = [-1] * n
+        self.action[start:end] = [-1] * n
+        self.visits[start:end] = [0] * n
+        self.value_sum[start:end] = [0.] * n
+        self.q[start:end] = [0.] * n
+        self.first_child[start:end] = [-1] * n
+        self.num_children[start:end] = [-1] * n
+        self.winner[start:end] = [None] * n
+        self.states[start:end] = [None] * n
+        self.next_states[start:end] = [None] * n
+        self.size = end
+        return start
+
+    def _children(self, node: int) -> range:
+        first = self.first_child[node]
+        return range(first, first + max(self.num_children[node], 0))
+
+    def _select(self) -> list:
+        node = self.root
+        path = [node]
+        num_children, states, select_child = self.num_children, self.states, self._select_child
+        while num_children[node] > 0:
+            node = select_child(node)
+            path.append(node)
+            if states[node] is None:
+                self._get_state(node)
+        return path
+
+    def _get_state(self, node: int):
+        state = self.states[node]
+        if state is None:
+            parent = self.parent[node]
+            index = node - self.first_child[parent]
+            state = tuple(component[index] for component in self.next_states[parent])
+            self.states[node] = state
+        return state
+
+    def _select_child(self, node: int) -> int:
+        first = self.first_child[node]
+        end = first + self.num_children[node]
+        visits = self.visits
+        if self.selection == 'puct':
+            factor = self.c * math.sqrt(visits[node])
+            scores = [v + factor * p / (n + 1) for v, p, n in
+                    zip(self.q[first:end], self.prior[first:end], visits[first:end])]
+        else:
+            log_total = math.log(max(visits[node], 2))
+            scores = [v + self.c * math.sqrt(log_total / n) if n else math.inf
+                    for v, n in zip(self.q[first:end], visits[first:end])]  # unvisited children get inf
+        return first + scores.index(max(scores))
+
+    def _get_winner(self, node: int):
+        state = self.states[node]
+        code = self.action[node]
+        if self.incremental_winner and 0 <= code < self.num_actions - 1:
+            return self.env.get_winner(state, divmod(code, self.board_shape[1]))
+        return self.env.get_winner(state)
+
+    def _evaluate(self, pending: list, virtual_loss: bool=True):
+        states = [self.states[path[-1]] for path in pending]
+        policies, values = self.evaluate(states)
+        visits, value_sum, q, mover = self.visits, self.value_sum, self.q, self.mover
+        for i, path in enumerate(pending):
+            leaf = path[-1]
+            if self.num_children[leaf] < 0:
+                self._expand(leaf, None if policies is None else policies[i])
+            value = float(values[i]) * states[i][1]  # from the view of BLACK
+            if not virtual_loss:
+                self._backup(path, value)
+                continue
+            for node in path:  # take back the virtual loss, and back up the value
+                total = value_sum[node] + self.virtual_loss + value * mover[node]
+                value_sum[node] = total
+                q[node] = total / visits[node]
+
+    def _expand(self, node: int, policy):
+        state = self.states[node]
+        codes, next_states = self.env.get_all_next_states(state)
+        count = len(codes)
+        if policy is None:
+            priors = [1. / count] * count
+        else:
+            priors = np.asarray(policy, dtype=float)[codes]
+            total = priors.sum()
+            priors = (priors / total).tolist() if total > 0 else [1. / count] * count
+        first = self._allocate(count)
+        end = first + count
+        self.parent[first:end] = [node] * count
+        self.action[first:end] = codes.tolist()
+        self.mover[first:end] = [int(state[1])] * count
+        self.prior[first:end] = priors
+        self.first_child[node] = first
+        self.num_children[node] = count
+        self.next_states[node] = next_states
+
+    def _backup(self, path: list, value: float):
+        """value is from the view of BLACK"""
+        visits, value_sum, q, mover = self.visits, self.value_sum, self.q, self.mover
+        for node in path:
+            n = visits[node] = visits[node] + 1
+            total = value_sum[node] + value * mover[node]
+            value_sum[node] = total
+            q[node] = total / n
+
+    def _compact(self, root: int):
+        order = [root]
+        index = 0
+        while index < len(order):
+            node = order[index]
+            if self.num_children[node] > 0:
+                first = self.first_child[node]
+                order.extend(range(first, first + self.num_children[node]))
+            index += 1
+        mapping = {old: new for new, old in enumerate(order)}
+
+        size = len(order)
+        for name in ('action', 'mover', 'prior', 'visits', 'value_sum', 'q',
+                'num_children', 'winner', 'states', 'next_states'):
+            array = getattr(self, name)
+            array[:size] = [array[node] for node in order]
+        self.parent[:size] = [mapping.get(self.parent[node], -1) for node in order]
+        self.parent[0] = -1
+        self.first_child[:size] = [mapping.get(self.first_child[node], -1) for node in order]
+        self.size = size
+        self.root = 0
@@ -0,0 +1,55 @@
+import functools
+import time
+
+
+class CallProfiler:
+
+    def __init__(self):
+        """Count the calls of methods and accumulate their wall time."""
+        self.calls = {}
+        self.seconds = {}
+
+    def clear(self):
+        """Reset the counters."""
+        for name in self.calls:
+            self.calls[name] = 0
+            self.seconds[name] = 0.
+
+    def info(self) -> dict:
+        """Get the statistics of the methods.
+
+        Returns
+        ----
+        info : dict    for every method name, a dict of 'calls', 'seconds'
+            and 'mean_seconds'. Seconds include the time of nested calls.
+        """
+        return {name: {'calls': calls, 'seconds': self.seconds[name],
+                'mean_seconds': self.seconds[name] / calls if calls else 0.}
+                for name, calls in self.calls.items()}
+
+    def wrap(self, name: str, method):
+        """Count the calls of a method and accumulate its wall time.
+
+        Parameters
+        ----
+        name : str    name of the method in the statistics
+        method : callable
+
+        Returns
+        ----
+        wrapped : callable
+        """
+        self.calls.setdefault(name, 0)
+        self.seconds.setdefault(name, 0.)
+        calls, seconds = self.calls, self.seconds
+        perf_counter = time.perf_counter
+
+        @functools.wraps(method)
+        def wrapped(*args, **kwargs):
+            tic = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds[name] += perf_counter() - tic
+                calls[name] += 1
+        return wrapped
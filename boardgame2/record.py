@@ -0,0 +1,268 @@
+import struct
+
+import numpy as np
+
+from .env import encode_action, decode_action
+from .go import GoEnv
+
+
+RECORD_MAGIC = b'BG2G'
+RECORD_HEADER = struct.Struct('<4sQHHbB2xI')  # magic, game id, height, width, winner, ended, moves
+MOVE_DTYPE = np.dtype('<u2')
+
+
+class GameRecordWriter:
+
+    def __init__(self, path, env):
+        """Stream games played by an env into a record file.
+
+        Every game is stored as a header with the game id, the board shape,
+        the winner and the number of moves, followed by the moves encoded as
+        uint16 cell indices. Games are appended to the file when they end.
+
+        Parameters
+        ----
+        path : str    the file is created or appended
+        env : BoardGameEnv    the env, or a gym wrapper of it, to play
+        """
+        self.env = env
+        self.board_shape = env.unwrapped.board.shape
+        if np.prod(self.board_shape) + 1 > np.iinfo(MOVE_DTYPE).max:
+            raise ValueError('board is too large to record')
+        self.file = open(path, 'ab')
+        self.game_id = None
+        self.moves = []
+        self.observation = None
+        self.next_game_id = 0
+
+    def reset(self, game_id=None, **kwargs):
+        """Reset the env and begin a game. An unfinished game is written as not ended.
+
+        Parameters
+        ----
+        game_id : int or None    None means one more than the last game id
+        kwargs : dict    keyword arguments for env.reset()
+
+        Returns
+        ----
+        the return of env.reset()
+        """
+        if self.game_id is not None:
+            self.write_game(self.game_id, self.moves)
+        self.game_id = self.next_game_id if game_id is None else game_id
+        self.next_game_id = self.game_id + 1
+        self.moves = []
+        result = self.env.reset(**kwargs)
+        self.observation = result[0] if isinstance(result[0], tuple) else result
+        return result
+
+    def step(self, action):
+        """Step the env and record the action, as it is treated by the env.
+
+        Parameters
+        ----
+        action : np.array or int    location, or encoded action in discrete action mode
+
+        Returns
+        ----
+        the return of env.step()
+        """
+        env = self.env.unwrapped
+        played = env.parse_action(action)
+        passing = isinstance(env, GoEnv) and env.allow_pass \
+                and np.array_equal(played, env.PASS)
+        if not passing and not env.is_valid(self.observation, played):
+            played = env.illegal_equivalent_action
+        self.moves.append(encode_action(played, self.board_shape))
+
+        result = self.env.step(action)
+        self.observation, reward, termination = result[:3]
+        if termination or (len(result) == 5 and result[3]):
+            self.write_game(self.game_id, self.moves, winner=reward,
+                    ended=bool(termination))
+            self.game_id = None
+        return result
+
+    def write_game(self, game_id: int, moves, winner: int=0, ended: bool=False):
+        """Write a game directly.
+
+        Parameters
+        ----
+        game_id : int
+        moves : list of int    actions encoded by encode_action()
+        winner : int
+        ended : bool    whether the game has ended
+        """
+        header = RECORD_HEADER.pack(RECORD_MAGIC, game_id, *self.board_shape,
+                int(winner), ended, len(moves))
+        self.file.write(header)
+        self.file.write(np.asarray(moves, dtype=MOVE_DTYPE).tobytes())
+
+    def close(self):
+        """Write the unfinished game, if any, and close the file."""
+        if self.game_id is not None:
+            self.write_game(self.game_id, self.moves)
+            self.game_id = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class GameRecordReader:
+
+    def __init__(self, path, env):
+        """Memory-map a record file made by GameRecordWriter.
+
+        Only the headers are read when the file is opened. Positions are
+        replayed lazily with env.get_next_state().
+
+        Parameters
+        ----
+        path : str
+        env : BoardGameEnv    an env of the recorded game, used for replaying.
+            It is reset once to get the initial state.
+        """
+        self.env = env.unwrapped
+        self.data = np.memmap(path, dtype=np.uint8, mode='r') \
+                if _file_size(path) else np.zeros(0, dtype=np.uint8)
+
+        offsets, headers = [], []
+        offset = 0
+        while offset < len(self.data):
+            header = RECORD_HEADER.unpack_from(self.data, offset)
+            if header[0] != RECORD_MAGIC:
+                raise ValueError('bad record at byte {}'.format(offset))
+            offset += RECORD_HEADER.size
+            offsets.append(offset)
+            headers.append(header[1:])
+            offset += header[-1] * MOVE_DTYPE.itemsize
+        headers = np.array(headers, dtype=np.int64).reshape(-1, 6)
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.game_ids = headers[:, 0]
+        self.board_shapes = headers[:, 1:3]
+        self.winners = headers[:, 3].astype(np.int8)
+        self.ended = headers[:, 4].astype(bool)
+        self.lengths = headers[:, 5]
+
+        initial_state, _ = self.env.reset()
+        self.initial_state = tuple(np.array(x, copy=True) if isinstance(x, np.ndarray)
+                else x for x in initial_state)
+        if len(self) and not (self.board_shapes == self.initial_state[0].shape).all():
+            raise ValueError('board shape of the env does not match the records')
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def num_positions(self) -> int:
+        """Total number of recorded moves."""
+        return int(self.lengths.sum())
+
+    def get_moves(self, game: int) -> np.array:
+        """Get the encoded moves of a game without copying.
+
+        Parameters
+        ----
+        game : int    index of the game in the file
+
+        Returns
+        ----
+        moves : np.array    uint16 view into the file
+        """
+        return np.ndarray(self.lengths[game], dtype=MOVE_DTYPE, buffer=self.data,
+                offset=self.offsets[game])
+
+    def get_action(self, game: int, move: int) -> np.array:
+        """Get an action of a game.
+
+        Parameters
+        ----
+        game : int    index of the game in the file
+        move : int    index of the move in the game
+
+        Returns
+        ----
+        action : np.array
+        """
+        return decode_action(self.get_moves(game)[move], self.board_shapes[game])
+
+    def iter_states(self, game: int):
+        """Replay a game lazily.
+
+        Parameters
+        ----
+        game : int    index of the game in the file
+
+        Yields
+        ----
+        state : tuple    the state before each move, and the state after the
+            last move unless the game is ended by resigning
+        """
+        state = self.initial_state
+        for code in self.get_moves(game).tolist():
+            yield state
+            action = decode_action(code, self.board_shapes[game])
+            if np.array_equal(action, self.env.RESIGN):
+                return
+            state = self.env.get_next_state(state, action)
+            while self.env.get_winner(state) is None and not self.env.has_valid(state):
+                state = self.env.get_next_state(state, self.env.PASS)
+        yield state
+
+    def get_state(self, game: int, move: int):
+        """Replay a game up to a move.
+
+        Parameters
+        ----
+        game : int    index of the game in the file
+        move : int    index of the move in the game
+
+        Returns
+        ----
+        state : tuple    the state before the move
+        """
+        if not 0 <= move <= self.lengths[game]:
+            raise IndexError('move {} is out of range'.format(move))
+        for index, state in enumerate(self.iter_states(game)):
+            if index == move:
+                return state
+        raise IndexError('move {} is after resigning'.format(move))
+
+    def sample(self, n: int, rng=None) -> list:
+        """Sample positions uniformly over all recorded moves.
+
+        Parameters
+        ----
+        n : int    number of positions
+        rng : np.random.Generator or None
+
+        Returns
+        ----
+        samples : list of (state, action, winner)
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        ends = np.cumsum(self.lengths)
+        positions = rng.integers(ends[-1], size=n)
+        games = np.searchsorted(ends, positions, side='right')
+        moves = positions - (ends[games] - self.lengths[games])
+        return [(self.get_state(game, move), self.get_action(game, move), self.winners[game])
+                for game, move in zip(games.tolist(), moves.tolist())]
+
+    def close(self):
+        """Release the memory map. Views from get_moves() keep it open until they are freed."""
+        self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _file_size(path) -> int:
+    with open(path, 'rb') as f:
+        return f.seek(0, 2)
@@ -1,17 +1,460 @@
-import copy
-import itertools
+import functools
 
-from .env import EMPTY
-from .env import BoardGameEnv
-from .env import is_index
+import numpy as np
+
+from .env import EMPTY, BLACK, WHITE, NO_CHANGE, ROLLOUT_DTYPE
+from .env import BoardGameEnv, GameState
+from .env import is_index, readonly_view
+
+
+@functools.lru_cache(maxsize=None)
+def get_bitboard_directions(board_shape) -> tuple:
+    """Get the shift tables used by the bitboard move generator.
+
+    Cell (x, y) of a board with shape (h, w) is stored at bit x * w + y.
+
+    Parameters
+    ----
+    board_shape : (int, int)
+
+    Returns
+    ----
+    directions : tuple of (int, tuple, int)
+        For each of the 8 directions, the signed shift of one step, the
+        signed shifts of the Kogge-Stone doubling steps, and the mask of
+        cells that a one-step shift may land on without wrapping around.
+    """
+    h, w = board_shape
+    full = (1 << (h * w)) - 1
+    first_column = sum(1 << (x * w) for x in range(h))
+    last_column = first_column << (w - 1)
+    directions = []
+    for dx in [-1, 0, 1]:  # loop on the 8 directions
+        for dy in [-1, 0, 1]:
+            if (dx, dy) == (0, 0):
+                continue
+            shift = dx * w + dy
+            mask = full
+            if dy == 1:
+                mask &= ~first_column
+            elif dy == -1:
+                mask &= ~last_column
+            steps = []
+            step, reach = shift, 1
+            while reach < max(h, w) - 2:  # longest run of opponent discs
+                steps.append(step)
+                step, reach = 2 * step, 2 * reach + 1
+            directions.append((shift, tuple(steps), mask))
+    return tuple(directions)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_bit_digits(player: int) -> bytes:
+    """Translation table from the bytes of an int8 board to binary digits."""
+    return bytes(b'01'[value == player & 0xff] for value in range(256))
+
+
+def get_bitboard(board: np.array, player: int) -> int:
+    """Get the bitboard of a player.
+
+    The bytes of the board are translated to binary digits, last cell
+    first, and parsed by int().
+
+    Parameters
+    ----
+    board : np.array
+    player : int
+
+    Returns
+    ----
+    bits : int    bit x * w + y is set iff board[x, y] == player
+    """
+    cells = np.asarray(board, dtype=np.int8).tobytes()[::-1]
+    return int(cells.translate(_get_bit_digits(int(player))), 2)
+
+
+def get_bitboard_arrays(bits: list, board_shape) -> np.array:
+    """Convert bitboards of at most 64 cells back to arrays.
+
+    Parameters
+    ----
+    bits : list of int
+    board_shape : (int, int)
+
+    Returns
+    ----
+    arrays : np.array    int8 array of 0 and 1 with shape (len(bits),) + board_shape
+    """
+    size = board_shape[0] * board_shape[1]
+    packed = np.array(bits, dtype='<u8').view(np.uint8).reshape(len(bits), 8)
+    arrays = np.unpackbits(packed, axis=1, count=size, bitorder='little')
+    return arrays.view(np.int8).reshape((len(bits),) + tuple(board_shape))
+
+
+def get_bitboard_array(bits: int, board_shape) -> np.array:
+    """Convert a bitboard back to an array.
+
+    Parameters
+    ----
+    bits : int
+    board_shape : (int, int)
+
+    Returns
+    ----
+    array : np.array    int8 array of 0 and 1 with shape board_shape
+    """
+    size = board_shape[0] * board_shape[1]
+    packed = np.frombuffer(bits.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    array = np.unpackbits(packed, count=size, bitorder='little')
+    return array.view(np.int8).reshape(board_shape)
+
+
+def _get_bitboard_ends(own: int, opp: int, board_shape, first_only: bool=False) -> list:
+    """Get the empty cells reached from own discs over opponent discs.
+
+    The runs of opponent discs are found by Kogge-Stone occluded fills.
+    Shifts are written out for each sign, since the calls of a helper
+    would cost more than the bit operations.
+
+    Returns a list of (shift, ends) for the directions with some ends, or
+    only the first one if first_only. A disc placed at ends flips the
+    opponent discs back along -shift.
+    """
+    empty = ~(own | opp)
+    lines = []
+    for shift, steps, mask in get_bitboard_directions(board_shape):
+        pro = opp & mask
+        if shift > 0:
+            gen = own | (pro & (own << shift))
+            for step in steps:
+                pro &= pro << step
+                gen |= pro & (gen << 2 * step)
+            ends = ((gen & opp) << shift) & mask & empty
+        else:
+            gen = own | (pro & (own >> -shift))
+            for step in steps:
+                pro &= pro >> -step
+                gen |= pro & (gen >> -2 * step)
+            ends = ((gen & opp) >> -shift) & mask & empty
+        if ends:
+            lines.append((shift, ends))
+            if first_only:
+                break
+    return lines
+
+
+def get_bitboard_valid(own: int, opp: int, board_shape) -> int:
+    """Get the bitboard of all valid locations.
+
+    Parameters
+    ----
+    own : int    bitboard of the player to move
+    opp : int    bitboard of the opponent
+    board_shape : (int, int)
+
+    Returns
+    ----
+    valid : int    bitboard of valid locations
+    """
+    valid = 0
+    for _, ends in _get_bitboard_ends(own, opp, board_shape):
+        valid |= ends
+    return valid
+
+
+def get_bitboard_flips(own: int, opp: int, move: int, board_shape) -> int:
+    """Get the bitboard of discs flipped by a move.
+
+    Parameters
+    ----
+    own : int    bitboard of the player to move
+    opp : int    bitboard of the opponent
+    move : int    bitboard with only the bit of the placed disc set
+    board_shape : (int, int)
+
+    Returns
+    ----
+    flips : int    bitboard of opponent discs that are flipped
+    """
+    flips = 0
+    for shift, _, mask in get_bitboard_directions(board_shape):
+        run = 0
+        if shift > 0:
+            disc = (move << shift) & mask
+            while disc & opp:
+                run |= disc
+                disc = (disc << shift) & mask
+        else:
+            disc = (move >> -shift) & mask
+            while disc & opp:
+                run |= disc
+                disc = (disc >> -shift) & mask
+        if disc & own:
+            flips |= run
+    return flips
+
+
+def get_bitboard_moves(own: int, opp: int, board_shape) -> list:
+    """Get all valid locations and the discs they flip.
+
+    The ends of the runs of opponent discs are kept for every direction,
+    so each move only walks back along the directions where it flips.
+
+    Parameters
+    ----
+    own : int    bitboard of the player to move
+    opp : int    bitboard of the opponent
+    board_shape : (int, int)
+
+    Returns
+    ----
+    moves : list of (int, int)    the bitboard of every valid location,
+        lowest bit first, and the bitboard of the discs it flips
+    """
+    lines = _get_bitboard_ends(own, opp, board_shape)
+    valid = 0
+    for _, ends in lines:
+        valid |= ends
+    moves = []
+    while valid:
+        move = valid & -valid  # the lowest valid location
+        valid ^= move
+        flips = 0
+        for shift, ends in lines:
+            if not ends & move:
+                continue
+            if shift > 0:  # walk back to the own disc
+                disc = move >> shift
+                while disc & opp:
+                    flips |= disc
+                    disc >>= shift
+            else:
+                disc = move << -shift
+                while disc & opp:
+                    flips |= disc
+                    disc <<= -shift
+        moves.append((move, flips))
+    return moves
+
+
+DIRECTIONS = [(dx, dy) for dx in [-1, 0, 1] for dy in [-1, 0, 1] if (dx, dy) != (0, 0)]
+
+
+@functools.lru_cache(maxsize=None)
+def get_ray_table(board_shape) -> np.array:
+    """Get the cells along the 8 directions from every cell.
+
+    Parameters
+    ----
+    board_shape : (int, int)
+
+    Returns
+    ----
+    table : np.array    read-only array of shape (h * w, 8, max(h, w) - 1).
+        table[i, d, k] is the flat index of the cell k + 1 steps away from
+        cell i along DIRECTIONS[d], or h * w if it is outside the board,
+        which indexes the EMPTY cell appended to a padded board.
+    """
+    h, w = board_shape
+    length = max(h, w) - 1
+    table = np.full((h * w, len(DIRECTIONS), length), h * w, dtype=np.intp)
+    x, y = np.divmod(np.arange(h * w), w)
+    for d, (dx, dy) in enumerate(DIRECTIONS):
+        for k in range(length):
+            xx, yy = x + (k + 1) * dx, y + (k + 1) * dy
+            inside = (xx >= 0) & (xx < h) & (yy >= 0) & (yy < w)
+            table[inside, d, k] = (xx * w + yy)[inside]
+    table.flags.writeable = False
+    return table
+
+
+def _get_run_lengths(lines: np.array, players: np.array) -> np.array:
+    """Count the opponent discs closed by a disc of the player along lines.
+
+    lines has shape (..., L), and players broadcasts to (..., 1).
+    """
+    stops = (lines == -players).argmin(axis=-1)  # first cell that is not the opponent's
+    closed = np.take_along_axis(lines, stops[..., np.newaxis], axis=-1)[..., 0] \
+            == players[..., 0]
+    return np.where(closed, stops, 0)
+
+
+def _get_ray_valid(boards: np.array, players: np.array) -> np.array:
+    n, h, w = boards.shape
+    padded = np.zeros((n, h * w + 1), dtype=boards.dtype)
+    padded[:, :-1] = boards.reshape(n, -1)
+    lines = padded[:, get_ray_table((h, w))]
+    lengths = _get_run_lengths(lines, players.reshape(-1, 1, 1, 1))
+    return (lengths > 0).any(axis=-1).reshape(boards.shape)
+
+
+def _get_shift_valid(boards: np.array, players: np.array) -> np.array:
+    n, h, w = boards.shape
+    p = max(h, w) - 1  # the padding makes every shifted board a view
+    own = np.zeros((n, h + 2 * p, w + 2 * p), dtype=bool)
+    opp = np.zeros_like(own)
+    players = players.reshape(-1, 1, 1)
+    np.equal(boards, players, out=own[:, p:p + h, p:p + w])
+    np.equal(boards, -players, out=opp[:, p:p + h, p:p + w])
+    valid = np.zeros(boards.shape, dtype=bool)
+    run = np.empty_like(valid)
+    for dx, dy in DIRECTIONS:
+        np.copyto(run, opp[:, p + dx:p + dx + h, p + dy:p + dy + w])
+        for k in range(2, p + 1):
+            if not run.any():
+                break
+            x, y = p + k * dx, p + k * dy
+            valid |= run & own[:, x:x + h, y:y + w]
+            run &= opp[:, x:x + h, y:y + w]
+    return valid
+
+
+def get_array_valid(boards: np.array, players) -> np.array:
+    """Get all valid locations of Reversi boards of any shape.
+
+    Large batches shift the whole boards along every direction, and small
+    ones gather the cells along the rays of get_ray_table().
+
+    Parameters
+    ----
+    boards : np.array    a board of shape (H, W), or boards of shape (N, H, W)
+    players : int or np.array    the player to move, or players of shape (N,)
+
+    Returns
+    ----
+    valid : np.array    int8 array of the same shape as boards
+    """
+    boards = np.asarray(boards)
+    single = boards.ndim == 2
+    boards = boards.reshape((-1,) + boards.shape[-2:])
+    players = np.asarray(players).reshape(-1)
+    if len(boards) < 16:
+        valid = _get_ray_valid(boards, players)
+    else:
+        valid = _get_shift_valid(boards, players)
+    valid &= boards == EMPTY
+    valid = valid.view(np.int8)
+    return valid[0] if single else valid
+
+
+def get_array_flips(boards: np.array, players, locations) -> np.array:
+    """Get the discs flipped by moves on Reversi boards of any shape.
+
+    Parameters
+    ----
+    boards : np.array    a board of shape (H, W), or boards of shape (N, H, W)
+    players : int or np.array    the player to move, or players of shape (N,)
+    locations : np.array    the location of the move of shape (2,), or
+        locations of shape (N, 2)
+
+    Returns
+    ----
+    flips : np.array    bool array of the same shape as boards. The moves
+        are valid iff they are on EMPTY cells and flip some discs.
+    """
+    boards = np.asarray(boards)
+    single = boards.ndim == 2
+    boards = boards.reshape((-1,) + boards.shape[-2:])
+    n, h, w = boards.shape
+    players = np.asarray(players).reshape(-1, 1, 1)
+    locations = np.asarray(locations).reshape(-1, 2)
+    rays = get_ray_table((h, w))[locations[:, 0] * w + locations[:, 1]]  # (N, 8, L)
+    padded = np.zeros((n, h * w + 1), dtype=boards.dtype)
+    padded[:, :-1] = boards.reshape(n, -1)
+    rows = np.broadcast_to(np.arange(n).reshape(-1, 1, 1), rays.shape)
+    lengths = _get_run_lengths(padded[rows, rays], players)
+    flipped = np.arange(rays.shape[-1]) < lengths[..., np.newaxis]
+    flips = np.zeros((n, h * w + 1), dtype=bool)
+    flips[rows[flipped], rays[flipped]] = True
+    flips = flips[:, :-1].reshape(boards.shape)
+    return flips[0] if single else flips
+
+
+@functools.lru_cache(maxsize=None)
+def get_ray_lists(board_shape) -> tuple:
+    """Get the rays of get_ray_table() as tuples, to be walked with Python scalars.
+
+    Parameters
+    ----
+    board_shape : (int, int)
+
+    Returns
+    ----
+    rays : tuple    rays[i] are the rays from cell i along DIRECTIONS that
+        have at least 2 cells, as tuples of flat indices
+    """
+    size = board_shape[0] * board_shape[1]
+    return tuple(tuple(tuple(j for j in ray if j < size)
+            for ray in cell_rays if len(ray) > 1 and ray[1] < size)
+            for cell_rays in get_ray_table(board_shape).tolist())
+
+
+def get_scalar_moves(board: np.array, player: int, first_only: bool=False) -> list:
+    """Get the valid locations of a Reversi board and the discs they flip.
+
+    The rays of get_ray_lists() are walked over the bytes of the board.
+    For a single board, this is much faster than array operations, each of
+    which costs microseconds on such small arrays.
+
+    Parameters
+    ----
+    board : np.array    a board of shape (H, W)
+    player : int    the player to move
+    first_only : bool    stop at the first valid location
+
+    Returns
+    ----
+    moves : list of (int, list of int)    the flat index of every valid
+        location in order, and the flat indices of the discs it flips
+    """
+    cells = np.asarray(board, dtype=np.int8).tobytes()  # bytes index as Python ints
+    rays = get_ray_lists(board.shape)
+    own, opp = int(player) & 0xff, -int(player) & 0xff
+    moves = []
+    for i, cell in enumerate(cells):
+        if cell != EMPTY:
+            continue
+        flips = []
+        for ray in rays[i]:
+            if cells[ray[0]] != opp:
+                continue
+            for k, j in enumerate(ray):
+                if cells[j] != opp:
+                    if cells[j] == own:
+                        flips += ray[:k]
+                    break
+        if flips:
+            moves.append((i, flips))
+            if first_only:
+                break
+    return moves
 
 
 class ReversiEnv(BoardGameEnv):
 
-    def __init__(self, board_shape=8, render_characters: str='+ox'):
+    def __init__(self, board_shape=8, render_characters: str='+ox',
+            use_bitboard: bool=False, action_mode: str='box'):
+        """Create a Reversi game.
+
+        Parameters
+        ----
+        board_shape: int or tuple    shape of the board
+        render_characters: str with length 3. characters used to render ('012', ' ox', etc)
+        use_bitboard: bool=False
+            - True:  generate moves and flips with bitboards of at most 64 cells,
+              built from the board once per call (see get_bitboard()).
+              Playouts of rollout() run on bitboards one at a time.
+            - False: generate moves and flips of a board with Python scalars
+              (see get_scalar_moves()), and of batches by array operations
+              (see get_array_valid() and get_array_flips())
+        action_mode: str='box'    'box' or 'discrete'. See BoardGameEnv.
+        """
         super().__init__(board_shape=board_shape,
             illegal_action_mode='resign', render_characters=render_characters,
-            allow_pass=False)  # reversi does not allow pass
+            allow_pass=False, action_mode=action_mode)  # reversi does not allow pass
+        if use_bitboard and self.board.size > 64:
+            raise ValueError('Bitboards support at most 64 cells.')
+        self.use_bitboard = use_bitboard
 
     def reset(self, *, seed=None, return_info=True, options=None):
         super().reset(seed=seed, return_info=return_info, options=options)
@@ -19,9 +462,11 @@ class ReversiEnv(BoardGameEnv):
         x, y = (s // 2 for s in self.board.shape)
         self.board[x - 1][y - 1] = self.board[x][y] = 1
         self.board[x - 1][y] = self.board[x][y - 1] = -1
-        next_state = self.board, self.player
+        next_state = readonly_view(self.board), self.player
+        self.key = self.hash_state(next_state)
+        info = self.update_action_mask(next_state, {'hash': self.key})
         if return_info:
-            return next_state, {}
+            return next_state, info
         else:
             return next_state
 
@@ -36,61 +481,229 @@ class ReversiEnv(BoardGameEnv):
         ----
         valid : bool     whether the current action is a valid action
         """
-        board, player = copy.deepcopy(state)
-
+        board, player = state
         if not is_index(board, action):
             return False
-
         x, y = action
         if board[x, y] != EMPTY:
             return False
+        if self.use_bitboard:
+            own, opp = get_bitboard(board, player), get_bitboard(board, -player)
+            move = 1 << int(x * board.shape[1] + y)
+            return bool(get_bitboard_flips(own, opp, move, board.shape))
+        return bool(get_array_flips(board, player, action).any())
 
-        for dx in [-1, 0, 1]:  # loop on the 8 directions
-            for dy in [-1, 0, 1]:
-                if (dx, dy) == (0, 0):
-                    continue
-                xx, yy = x, y
-                for count in itertools.count():
-                    xx, yy = xx + dx, yy + dy
-                    if not is_index(board, (xx, yy)):
-                        break
-                    if board[xx, yy] == EMPTY:
-                        break
-                    if board[xx, yy] == -player:
-                        continue
-                    if count:  # and is player
-                        return True
-                    break
-        return False
+    def get_valid(self, state):
+        """
+        Parameters
+        ----
+        state : (np.array, int)    board and player
 
-    def get_next_state(self, state, action):
+        Returns
+        ----
+        valid : np.array     current valid place for the player
+        """
+        board, player = state
+        if not self.use_bitboard:
+            valid = np.zeros(board.shape, dtype=np.int8)
+            valid.flat[[i for i, _ in get_scalar_moves(board, player)]] = 1
+            return valid
+        own, opp = get_bitboard(board, player), get_bitboard(board, -player)
+        valid = get_bitboard_valid(own, opp, board.shape)
+        return get_bitboard_array(valid, board.shape)
+
+    def has_valid(self, state) -> bool:
+        """
+        Parameters
+        ----
+        state : (np.array, int)    board and player
+
+        Returns
+        ----
+        has_valid : bool
         """
+        board, player = state
+        if not self.use_bitboard:
+            return bool(get_scalar_moves(board, player, first_only=True))
+        own, opp = get_bitboard(board, player), get_bitboard(board, -player)
+        return bool(_get_bitboard_ends(own, opp, board.shape, first_only=True))
+
+    def get_winner(self, state):
+        """See BoardGameEnv.get_winner()"""
+        if not self.use_bitboard:
+            return super().get_winner(state)
+        board = state[0]
+        black, white = get_bitboard(board, BLACK), get_bitboard(board, WHITE)
+        if _get_bitboard_ends(black, white, board.shape, first_only=True) or \
+                _get_bitboard_ends(white, black, board.shape, first_only=True):
+            return None
+        return np.sign(bin(black).count('1') - bin(white).count('1'))
+
+    def get_all_next_states(self, state) -> tuple:
+        """Get the next states of all valid actions of a state at once.
+
+        The valid locations and their flips are found by get_scalar_moves(),
+        and the next boards are written into one buffer. With bitboards, the
+        bitboards of the board are built once, and the next boards are
+        unpacked from the bitboards of all the moves together. See
+        BoardGameEnv.get_all_next_states().
+
         Parameters
         ----
         state : (np.array, int)    board and current player
+
+        Returns
+        ----
+        codes : np.array    the valid actions encoded by encode_action(), of shape (K,)
+        next_states : tuple    boards of shape (K, H, W) and players of shape (K,)
+        """
+        if self.use_bitboard:
+            return self._get_all_next_bitboards(state)
+        board, player = state[0], int(state[1])
+        moves = get_scalar_moves(board, player)
+        count = max(len(moves), 1)
+        data = bytearray(np.asarray(board, dtype=np.int8).tobytes() * count)
+        disc = player & 0xff
+        for offset, (index, flips) in zip(range(0, len(data), board.size), moves):
+            data[offset + index] = disc
+            for j in flips:
+                data[offset + j] = disc
+        boards = np.frombuffer(data, dtype=np.int8).reshape((count,) + board.shape)
+        players = np.empty(count, dtype=np.int8)
+        players.fill(-player)
+        if not moves:
+            return np.array([board.size]), (boards, players)  # PASS
+        return np.array([index for index, _ in moves]), (boards, players)
+
+    def _get_all_next_bitboards(self, state) -> tuple:
+        board, player = state[0], int(state[1])
+        own, opp = get_bitboard(board, player), get_bitboard(board, -player)
+        moves = get_bitboard_moves(own, opp, board.shape)
+        codes = [move.bit_length() - 1 for move, _ in moves]
+        bits = [own | flips | move for move, flips in moves] + \
+                [opp ^ flips for _, flips in moves]
+        if not moves:  # PASS
+            codes, bits = [board.size], [own, opp]
+        arrays = get_bitboard_arrays(bits, board.shape)
+        boards = arrays[:len(codes)]
+        boards -= arrays[len(codes):]
+        if player != BLACK:
+            np.negative(boards, out=boards)
+        players = np.empty(len(codes), dtype=np.int8)
+        players.fill(-player)
+        return np.array(codes), (boards, players)
+
+    def rollout(self, state, n: int=1, rng=None, max_length=None) -> np.array:
+        """Play uniformly random valid moves from a state until the games end.
+
+        All playouts advance together: the valid locations and the flips of
+        the running playouts are generated by get_array_valid() and
+        get_array_flips() on batches. With bitboards, the playouts are
+        played one by one on bitboards instead. See BoardGameEnv.rollout().
+
+        Parameters
+        ----
+        state : (np.array, int)    board and player
+        n : int    number of playouts
+        rng : np.random.Generator, int or None    generator or seed
+        max_length : int or None    playouts are truncated after so many
+            moves, including passes
+
+        Returns
+        ----
+        results : np.array    structured array with dtype ROLLOUT_DTYPE
+        """
+        rng = np.random.default_rng(rng)
+        results = np.zeros(n, dtype=ROLLOUT_DTYPE)
+        if self.use_bitboard:
+            for i in range(n):
+                results[i] = self._rollout_bitboard(state, rng, max_length)
+            return results
+        boards = np.repeat(np.asarray(state[0], dtype=np.int8)[np.newaxis], n, axis=0)
+        players = np.full(n, state[1], dtype=np.int8)
+        width = boards.shape[2]
+        running = np.arange(n)
+        length = 0
+        while len(running):
+            if max_length is not None and length >= max_length:
+                results['truncated'][running] = True
+                break
+            board, player = boards[running], players[running]
+            valid = get_array_valid(board, player).reshape(len(running), -1)
+            moving = valid.any(axis=1)
+            ended = ~moving
+            if ended.any():  # pass, or end if the opponent can not move either
+                ended[ended] = ~get_array_valid(board[ended], -player[ended]).any(axis=(1, 2))
+                index = running[ended]
+                results['winner'][index] = np.sign(board[ended].sum(axis=(1, 2), dtype=int))
+                results['length'][index] = length
+            if moving.any():
+                codes = (rng.random((moving.sum(), valid.shape[1])) * valid[moving]).argmax(axis=1)
+                x, y = np.divmod(codes, width)
+                moved, mover = board[moving], player[moving]
+                flips = get_array_flips(moved, mover, np.stack([x, y], axis=1))
+                moved[flips] = np.broadcast_to(mover[:, np.newaxis, np.newaxis], moved.shape)[flips]
+                moved[np.arange(len(moved)), x, y] = mover
+                boards[running[moving]] = moved
+            running = running[~ended]
+            players[running] = -players[running]
+            length += 1
+        results['length'][running] = length
+        return results
+
+    def _rollout_bitboard(self, state, rng, max_length) -> tuple:
+        board, player = state[0], int(state[1])
+        own, opp = get_bitboard(board, player), get_bitboard(board, -player)
+        randoms = []
+        length = 0
+        while max_length is None or length < max_length:
+            moves = get_bitboard_moves(own, opp, board.shape)
+            if not moves:  # pass, or end if the opponent can not move either
+                if not _get_bitboard_ends(opp, own, board.shape, first_only=True):
+                    count = bin(own).count('1') - bin(opp).count('1')
+                    return (player if count > 0 else -player if count < 0 else EMPTY), length, False
+            else:
+                if not randoms:
+                    randoms = rng.random(64).tolist()
+                move, flips = moves[int(randoms.pop() * len(moves))]
+                own, opp = own | flips | move, opp ^ flips
+            own, opp, player = opp, own, -player
+            length += 1
+        return EMPTY, length, True
+
+    def make_move(self, state, action):
+        """
+        Parameters
+        ----
+        state : (np.array, int)    board and current player. The board is changed.
         action : np.array    location
 
         Returns
         ----
-        next_state : (np.array, int)    next board and next player
+        undo : (np.array, np.array)    flat indices of the placed and flipped discs and their previous values
         """
-        board, player = copy.deepcopy(state)
-        if self.is_valid(state, action):
-            x, y = action
-            board[x, y] = player
-            for dx in [-1, 0, 1]:  # loop on the 8 directions
-                for dy in [-1, 0, 1]:
-                    if (dx, dy) == (0, 0):
-                        continue
-                    xx, yy = x, y
-                    for count in itertools.count():
-                        xx, yy = xx + dx, yy + dy
-                        if not is_index(board, (xx, yy)):
-                            break
-                        if board[xx, yy] == EMPTY:
-                            break
-                        if board[xx, yy] == player:
-                            for i in range(count+1):  # overwrite
-                                board[x + i * dx, y + i * dy] = player
-                            break
-        return board, -player
+        board, player = state
+        if isinstance(state, GameState):
+            state.key = None
+        if not is_index(board, action):
+            return NO_CHANGE
+        x, y = action
+        if board[x, y] != EMPTY:
+            return NO_CHANGE
+
+        if self.use_bitboard:
+            own, opp = get_bitboard(board, player), get_bitboard(board, -player)
+            move = 1 << int(x * board.shape[1] + y)
+            flips = get_bitboard_flips(own, opp, move, board.shape)
+            if not flips:
+                return NO_CHANGE
+            indices = np.flatnonzero(get_bitboard_array(flips | move, board.shape))
+        else:
+            flips = np.flatnonzero(get_array_flips(board, player, action))
+            if not len(flips):
+                return NO_CHANGE
+            indices = np.append(flips, x * board.shape[1] + y)
+
+        previous = board.flat[indices]
+        board.flat[indices] = player
+        return indices, previous
@@ -0,0 +1,165 @@
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+import gym
+
+from .env import BLACK
+
+
+RESULT_DTYPE = np.dtype([('winner', np.int8), ('length', np.int32),
+        ('truncated', np.bool_), ('seconds', np.float32)])
+
+
+def random_agent(env, observation) -> np.array:
+    """Choose a valid location uniformly at random, or pass if there is none.
+
+    Parameters
+    ----
+    env : BoardGameEnv    the env that plays the game
+    observation : tuple    the current state
+
+    Returns
+    ----
+    action : np.array    location
+    """
+    locations = np.argwhere(env.get_valid(observation))
+    if not len(locations):
+        return env.PASS
+    return locations[np.random.randint(len(locations))]
+
+
+def play_game(env, agents, seed=None, max_length=None) -> tuple:
+    """Play one game.
+
+    Parameters
+    ----
+    env : BoardGameEnv    the env is reset at the beginning
+    agents : (callable, callable)    agents of BLACK and WHITE.
+        An agent is called as agent(env, observation) and returns an action.
+    seed : int or None    seed of np.random, which is used by random_agent()
+    max_length : int or None    the game is truncated after so many actions
+
+    Returns
+    ----
+    winner : int    0 for draws and truncated games
+    length : int    number of actions played by the agents
+    truncated : bool
+    """
+    if seed is not None:
+        np.random.seed(seed)
+    observation, _ = env.reset()
+    length = 0
+    while True:
+        agent = agents[0] if observation[1] == BLACK else agents[1]
+        action = agent(env, observation)
+        observation, reward, termination, truncation, _ = env.step(action)
+        length += 1
+        if termination or truncation:
+            return int(reward), length, bool(truncation)
+        if max_length is not None and length >= max_length:
+            return 0, length, True
+
+
+_worker = {}  # env, agents, results and seed owned by a worker process
+
+
+def _init_worker(env_id, env_kwargs, agents, shm_name, num_games, seed, max_length):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker['shm'] = shm  # keep the buffer alive
+    _worker['results'] = np.ndarray(num_games, dtype=RESULT_DTYPE, buffer=shm.buf)
+    _worker['env'] = gym.make(env_id, **{'new_step_api': True, **env_kwargs}).unwrapped
+    _worker['agents'] = agents
+    _worker['seed'] = seed
+    _worker['max_length'] = max_length
+
+
+def _close_worker():
+    shm = _worker.pop('shm', None)
+    _worker.clear()  # release the view before closing the buffer
+    if shm is not None:
+        shm.close()
+
+
+def _play_batch(batch) -> int:
+    start, stop = batch
+    env, agents, results, seed, max_length = (_worker[name]
+            for name in ['env', 'agents', 'results', 'seed', 'max_length'])
+    for index in range(start, stop):
+        tic = time.perf_counter()
+        game_seed = None if seed is None else [seed, index]
+        winner, length, truncated = play_game(env, agents, seed=game_seed,
+                max_length=max_length)
+        results[index] = (winner, length, truncated, time.perf_counter() - tic)
+    return stop - start
+
+
+def play_games(env_id: str, num_games: int, agents=(random_agent, random_agent),
+        num_workers=None, batch_size: int=16, seed=None, max_length=None,
+        env_kwargs=None, callback=None) -> tuple:
+    """Play many games in a pool of processes.
+
+    Each worker makes its own env once and reuses it for all its games.
+    Workers write the results into a shared-memory array, and only report
+    the number of finished games for every batch.
+
+    Parameters
+    ----
+    env_id : str    registered id, such as 'Reversi-v0'
+    num_games : int
+    agents : (callable, callable)    agents of BLACK and WHITE. They are sent
+        to the workers, so they should be picklable, e.g. module-level functions.
+    num_workers : int or None    number of processes. None means the number of
+        CPUs, and 0 means playing in the current process.
+    batch_size : int    number of games a worker plays before reporting
+    seed : int or None    if given, game i is seeded with (seed, i), so the
+        results do not depend on the number of workers
+    max_length : int or None    games are truncated after so many actions.
+        Random Go games can be very long without it.
+    env_kwargs : dict or None    keyword arguments for gym.make()
+    callback : callable or None    called as callback(finished, num_games)
+        after every batch
+
+    Returns
+    ----
+    results : np.array    structured array of shape (num_games,) with fields
+        'winner', 'length', 'truncated' and 'seconds'
+    info : dict    'games', 'seconds' and 'games_per_second'
+    """
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    batches = [(start, min(start + batch_size, num_games))
+            for start in range(0, num_games, batch_size)]
+    size = max(num_games, 1) * RESULT_DTYPE.itemsize
+
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        initargs = (env_id, env_kwargs or {}, agents, shm.name, num_games, seed, max_length)
+        tic = time.perf_counter()
+        if num_workers:
+            with multiprocessing.Pool(num_workers, initializer=_init_worker,
+                    initargs=initargs) as pool:
+                _collect(pool.imap_unordered(_play_batch, batches), num_games, callback)
+        else:
+            _init_worker(*initargs)
+            try:
+                _collect(map(_play_batch, batches), num_games, callback)
+            finally:
+                _close_worker()
+        seconds = time.perf_counter() - tic
+        results = np.ndarray(num_games, dtype=RESULT_DTYPE, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    info = {'games': num_games, 'seconds': seconds,
+            'games_per_second': num_games / seconds if seconds else float('inf')}
+    return results, info
+
+
+def _collect(counts, num_games: int, callback):
+    finished = 0
+    for count in counts:
+        finished += count
+        if callback is not None:
+            callback(finished, num_games)
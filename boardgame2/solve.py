@@ -0,0 +1,257 @@
+import numpy as np
+
+from .env import EMPTY, WHITE
+from .env import GameState
+from .env import get_symmetries, get_zobrist_table
+from .env import decode_action
+from .go import GoEnv
+from .kinarow import KInARowEnv
+
+
+EXACT, LOWER, UPPER = 0, 1, 2
+PROVEN = np.iinfo(np.int32).max  # depth of entries whose subtrees reach no horizon
+
+
+class Solver:
+
+    def __init__(self, env, use_symmetry: bool=True):
+        """Solve small games exactly by negamax with alpha-beta pruning.
+
+        The search deepens iteratively until no horizon is reached. Positions
+        are kept in a transposition table keyed by the canonical board among
+        its symmetries (see extend_board()) and the player to move. The
+        Zobrist hashes of all the symmetric boards are updated incrementally
+        along the search, and the board with the smallest hash is the
+        canonical one, so no board is transformed. Moves are ordered by the
+        best move in the table, then by the history heuristic.
+
+        Parameters
+        ----
+        env : BoardGameEnv    Reversi or k-in-a-row env. Go is not supported,
+            because its states depend on more than the board and the player.
+        use_symmetry : bool    whether to fold symmetric boards together
+        """
+        self.env = env.unwrapped
+        if isinstance(self.env, GoEnv):
+            raise ValueError('Go is not supported')
+        self.board_shape = self.env.board.shape
+        self.pass_code = self.env.board.size
+        self.use_symmetry = use_symmetry
+        self.incremental_winner = isinstance(self.env, KInARowEnv)
+        self.fill_empty = self.env.VALID_IS_EMPTY  # a move places one stone on an empty location
+        self.locations = [divmod(code, self.board_shape[1]) for code in range(self.pass_code)]
+
+        if use_symmetry:
+            _, permutations, _ = get_symmetries(self.board_shape)
+        else:
+            permutations = np.arange(self.pass_code)[np.newaxis]
+        zobrist = get_zobrist_table(self.board_shape)
+        self.permutations = permutations.tolist()  # canonical location -> location
+        self.inverses = np.argsort(permutations, axis=1).tolist()  # location -> canonical location
+        # cell_keys[color + 1][location][i] is the key of color at location on the i-th symmetric board
+        self.cell_keys = [[tuple(int(zobrist[color + 1, inverse[code]]) for inverse in self.inverses)
+                for code in range(self.pass_code)] for color in range(-1, 2)]
+        self.white_key = int(zobrist[WHITE + 1, -1])
+
+        self.table = {}  # key -> (value, flag, depth, canonical move)
+        self.history = [0] * (self.pass_code + 1)
+        self.nodes = 0
+
+    def solve(self, state, max_depth=None) -> tuple:
+        """Solve a state.
+
+        Parameters
+        ----
+        state : tuple    board and player
+        max_depth : int or None    stop deepening at this depth even if
+            the value is not proven
+
+        Returns
+        ----
+        value : int    1 if the player to move wins, -1 if loses, 0 if draws
+            (or unknown, if max_depth is reached)
+        action : np.array or None    a best action, or None if the game has ended
+        """
+        state = GameState(np.array(state[0], dtype=np.int8), int(state[1]))
+        keys = self._hash(state[0])
+        depth = 0
+        while max_depth is None or depth < max_depth:
+            depth += 1
+            value, proven = self._negamax(state, keys, depth, -1, 1, None)
+            if proven:
+                break
+        key, transform = self._key(keys, state.player)
+        entry = self.table.get(key)
+        if entry is None or entry[3] < 0:
+            return value, None
+        return value, self._decode(entry[3], transform)
+
+    def get_value(self, state) -> int:
+        """Get the exact value of a state for the player to move."""
+        return self.solve(state)[0]
+
+    def export(self, path: str, state=None, max_states=None) -> int:
+        """Solve all states reachable from a state, and save them.
+
+        The file is an npz with the arrays 'boards' (canonical boards of
+        shape (N, H, W)), 'players', 'values' (for the players to move) and
+        'moves' (best actions on the canonical boards, encoded by
+        encode_action(), or -1 if the game has ended).
+
+        Parameters
+        ----
+        path : str
+        state : tuple or None    None means the initial state of the env
+        max_states : int or None    stop after so many states
+
+        Returns
+        ----
+        count : int    number of states saved
+        """
+        if state is None:
+            state, _ = self.env.reset()
+        boards, players, values, moves = [], [], [], []
+        seen = set()
+        stack = [GameState(np.array(state[0], dtype=np.int8), int(state[1]))]
+        while stack and (max_states is None or len(boards) < max_states):
+            state = stack.pop()
+            key, transform = self._key(self._hash(state.board), state.player)
+            if key in seen:
+                continue
+            seen.add(key)
+            value, action = self.solve(state)
+            board = state.board.ravel()[self.permutations[transform]].reshape(self.board_shape)
+            boards.append(board)
+            players.append(state.player)
+            values.append(value)
+            if action is None:
+                moves.append(-1)
+                continue
+            moves.append(self.table[key][3])
+            for code in self._get_moves(state):
+                stack.append(self.env.get_next_state(state,
+                        decode_action(code, self.board_shape)))
+        np.savez_compressed(path, boards=np.array(boards, dtype=np.int8).reshape(
+                (-1,) + self.board_shape), players=np.array(players, dtype=np.int8),
+                values=np.array(values, dtype=np.int8), moves=np.array(moves, dtype=np.int16))
+        return len(boards)
+
+    def _hash(self, board: np.array) -> list:
+        keys = [0] * len(self.inverses)
+        for code, color in enumerate(board.ravel().tolist()):
+            if color != EMPTY:
+                keys = [key ^ cell_key for key, cell_key in
+                        zip(keys, self.cell_keys[color + 1][code])]
+        return keys
+
+    def _key(self, keys: list, player: int) -> tuple:
+        """Get the table key and the index of the canonical symmetry."""
+        key = min(keys)
+        transform = keys.index(key)
+        if player == WHITE:
+            key ^= self.white_key
+        return key, transform
+
+    def _decode(self, code: int, transform: int) -> np.array:
+        if code == self.pass_code:
+            return self.env.PASS
+        return decode_action(self.permutations[transform][code], self.board_shape)
+
+    def _get_winner(self, state, code):
+        if self.incremental_winner and code is not None and code != self.pass_code:
+            return self.env.get_winner(state, self.locations[code])
+        return self.env.get_winner(state)
+
+    def _get_moves(self, state) -> list:
+        if self.fill_empty:
+            codes = [code for code, color in enumerate(state[0].ravel().tolist())
+                    if color == EMPTY]
+        else:
+            codes = np.flatnonzero(self.env.get_valid(state)).tolist()
+        return codes if codes else [self.pass_code]
+
+    def _play(self, state, keys: list, code: int) -> tuple:
+        """Play a move in place, and get the keys of the next state and the undo token."""
+        board, player = state[0], state.player
+        cell_keys = self.cell_keys
+        if code == self.pass_code:
+            return keys, None
+        if self.fill_empty:
+            board.flat[code] = player
+            state.key = None
+            return [key ^ cell_key for key, cell_key in
+                    zip(keys, cell_keys[player + 1][code])], code
+        undo = self.env.make_move(state, self.locations[code])
+        indices = undo[0].tolist()
+        for index, previous, color in zip(indices, undo[1].tolist(),
+                board.flat[indices].tolist()):
+            keys = [key ^ old ^ new for key, old, new in
+                    zip(keys, cell_keys[previous + 1][index], cell_keys[color + 1][index])]
+        return keys, undo
+
+    def _unplay(self, state, undo):
+        if undo is None:
+            return
+        if self.fill_empty:
+            state[0].flat[undo] = EMPTY
+            state.key = None
+            return
+        self.env.unmake_move(state, undo)
+
+    def _negamax(self, state, keys: list, depth: int, alpha: int, beta: int, code) -> tuple:
+        self.nodes += 1
+        winner = self._get_winner(state, code)
+        if winner is not None:
+            return winner * state.player, True
+        if depth == 0:
+            return 0, False  # horizon
+
+        key, transform = self._key(keys, state.player)
+        entry = self.table.get(key)
+        first = None
+        if entry is not None:
+            value, flag, entry_depth, best_code = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value, entry_depth == PROVEN
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value, entry_depth == PROVEN
+            if best_code >= 0:
+                first = self.pass_code if best_code == self.pass_code \
+                        else self.permutations[transform][best_code]
+
+        codes = self._get_moves(state)
+        history = self.history
+        codes.sort(key=lambda code: (code != first, -history[code]))
+        original_alpha = alpha
+        best_value, best_code, proven = -2, -1, True
+        for code in codes:
+            child_keys, undo = self._play(state, keys, code)
+            state.player = -state.player
+            value, child_proven = self._negamax(state, child_keys, depth - 1,
+                    -beta, -alpha, code)
+            state.player = -state.player
+            self._unplay(state, undo)
+            value = -value
+            proven &= child_proven
+            if value > best_value:
+                best_value, best_code = value, code
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                history[code] += depth * depth
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if best_code != self.pass_code:
+            best_code = self.inverses[transform][best_code]
+        self.table[key] = (best_value, flag, PROVEN if proven else depth, best_code)
+        return best_value, proven
@@ -0,0 +1,18 @@
+import json
+
+from boardgame2 import bench
+
+
+def test_bench(tmp_path, recwarn):
+    path = tmp_path / 'bench.json'
+    bench.main(['--env', 'TicTacToe-v0', '--env', 'Reversi-v0', '--board-size', '4',
+            '--games', '1', '--min-time', '0.01', '--output', str(path)])
+    report = json.loads(path.read_text())
+    results = report['results']
+    assert [result['env_id'] for result in results] == ['TicTacToe-v0', 'Reversi-v0']
+    for result in results:
+        assert result['board_shape'] == [4, 4]
+        assert result['positions'] > 0
+        for name in ['playout_steps', 'reset', 'step', 'get_valid', 'get_winner']:
+            assert result[name] > 0
+    assert not [warning for warning in recwarn if 'step API' in str(warning.message)]
@@ -0,0 +1,280 @@
+import numpy as np
+import pytest
+import gym
+
+import boardgame2
+
+
+@pytest.mark.parametrize('env_id', ['Reversi-v0', 'TicTacToe-v0'])
+def test_hash(env_id):
+    env = gym.make(env_id, new_step_api=True)
+
+    observation, info = env.reset()
+    assert info['hash'] == env.hash_state(observation)
+    while True:
+        action = env.action_space.sample()
+        observation, reward, termination, truncation, info = env.step(action)
+        assert info['hash'] == env.hash_state(observation)
+        if termination or truncation:
+            break
+    board, player = observation
+    assert env.hash_state((board, player)) != env.hash_state((board, -player))
+    env.close()
+
+
+def test_cache():
+    env = gym.make('Reversi-v0', new_step_api=True)
+    env.enable_cache(max_bytes=10000)
+
+    observation, info = env.reset()
+    valid = env.get_valid(observation)
+    assert env.get_valid(observation) is valid
+    assert not valid.flags.writeable
+    assert env.cache_info()['hits'] == 1
+    while True:
+        locations = np.argwhere(env.get_valid(observation))
+        action = locations[np.random.randint(len(locations))]
+        observation, reward, termination, truncation, info = env.step(action)
+        if termination or truncation:
+            break
+    assert env.cache_info()['bytes'] <= 10000
+
+    env.disable_cache()
+    assert env.cache_info() is None
+    env.close()
+
+
+def test_cache_go():
+    env = gym.make('Go-v0', board_shape=5, new_step_api=True)
+    env.enable_cache()
+
+    env.reset(return_info=True)  # see test_go.test_go()
+    env.step(np.array([2, 2]))
+    for _ in range(3):
+        observation, reward, termination, truncation, info = env.step(env.PASS)
+        if termination:
+            break
+    assert termination and observation[3] == 2
+    assert reward == boardgame2.BLACK
+
+    board = np.zeros((5, 5), dtype=np.int8)
+    ko = np.zeros_like(board)
+    valid = env.get_valid((board, boardgame2.BLACK, ko, 0))
+    ko[2, 2] = 1
+    assert not env.get_valid((board, boardgame2.BLACK, ko, 0))[2, 2]
+    assert valid[2, 2]
+    env.close()
+
+
+def test_canonicalize():
+    board = np.zeros((3, 3), dtype=np.int8)
+    board[0, 1] = boardgame2.BLACK
+    board[2, 2] = boardgame2.WHITE
+    canonical, transform, inverse = boardgame2.canonicalize(board)
+    boards = boardgame2.extend_board(board)
+    assert np.array_equal(boards[transform], canonical)
+    assert np.array_equal(board.ravel()[inverse], canonical.ravel())
+    for symmetric_board in boards:
+        assert np.array_equal(boardgame2.canonicalize(symmetric_board)[0], canonical)
+
+    canonicals, transforms, inverses = boardgame2.canonicalize(boards)
+    assert canonicals.shape == (8, 3, 3)
+    assert np.all(canonicals == canonical)
+
+
+def test_game_state():
+    env = gym.make('Reversi-v0', new_step_api=True)
+    observation, info = env.reset()
+    state = boardgame2.GameState(*observation)
+    board, player = state
+    assert board is observation[0] and player == observation[1]
+    assert env.hash_state(state) == info['hash'] == state.key
+
+    next_state = env.get_next_state(state, np.array([2, 3]))
+    assert isinstance(next_state, boardgame2.GameState)
+    assert next_state.move_count == 1 and next_state.player == -player
+    key = next_state.key
+    next_state.key = None
+    assert env.hash_state(next_state) == key
+
+    undo = env.make_move(next_state, np.array([2, 2]))
+    assert next_state.key is None
+    env.unmake_move(next_state, undo)
+    assert env.hash_state(next_state) == key
+    env.close()
+
+
+def test_pack_board():
+    boards = np.random.default_rng(0).integers(-1, 2, size=(5, 7, 9)).astype(np.int8)
+    packed = boardgame2.pack_board(boards)
+    assert packed.shape == (5, 16) and packed.dtype == np.uint8
+    assert np.array_equal(boardgame2.unpack_board(packed, (7, 9)), boards)
+    assert np.array_equal(boardgame2.unpack_board(packed[2], (7, 9)), boards[2])
+
+    planes = boardgame2.unpack_planes(packed[0], (7, 9))
+    assert planes.shape == (2, 7, 9) and planes.dtype == np.float32
+    assert np.array_equal(planes[0], boards[0] == boardgame2.BLACK)
+    assert np.array_equal(planes[1], boards[0] == boardgame2.WHITE)
+
+
+@pytest.mark.parametrize('env_id', ['Reversi-v0', 'TicTacToe-v0'])
+def test_readonly_observation(env_id):
+    env = gym.make(env_id, new_step_api=True)
+    observation, _ = env.reset()
+    observation, _, _, _, _ = env.step(np.argwhere(env.get_valid(observation))[0])
+    board, _ = observation
+    with pytest.raises(ValueError):
+        board[0, 0] = boardgame2.BLACK
+    assert np.shares_memory(board, env.board)
+    env.close()
+
+
+def test_valid_is_empty():
+    board = np.array([[1, 0, -1], [0, 1, 0], [-1, 1, -1]], dtype=np.int8)
+    env = boardgame2.KInARowEnv(board_shape=3, target_length=3)
+    assert env.VALID_IS_EMPTY
+    valid = env.get_valid((board, boardgame2.BLACK))
+    for x in range(3):
+        for y in range(3):
+            assert valid[x, y] == env.is_valid((board, boardgame2.BLACK), np.array([x, y]))
+    assert env.has_valid((board, boardgame2.WHITE))
+    assert not env.has_valid((np.ones_like(board), boardgame2.WHITE))
+    assert not boardgame2.ReversiEnv(board_shape=4).VALID_IS_EMPTY
+    assert not boardgame2.GoEnv(board_shape=5).VALID_IS_EMPTY
+
+    class FirstRowEnv(boardgame2.BoardGameEnv):
+        def is_valid(self, state, action):
+            return super().is_valid(state, action) and action[0] == 0
+
+    env = FirstRowEnv(board_shape=3)
+    assert not env.VALID_IS_EMPTY
+    empty = np.zeros((3, 3), dtype=np.int8)
+    valid = env.get_valid((empty, boardgame2.BLACK))
+    assert valid[0].all() and not valid[1:].any()
+    assert np.array_equal(boardgame2.get_valid_batch(env,
+            (empty[np.newaxis], np.array([boardgame2.BLACK]))), valid[np.newaxis])
+    empty[0] = boardgame2.BLACK
+    assert not env.has_valid((empty, boardgame2.WHITE))
+
+    assert boardgame2.is_index(board, np.array([2, 0]))
+    assert not boardgame2.is_index(board, np.array([3, 0]))
+    assert not boardgame2.is_index(board, np.array([-1, 0]))
+    assert not boardgame2.is_index(board, np.array([1]))
+
+
+def test_profiling():
+    env = boardgame2.ReversiEnv(board_shape=6)
+    assert env.stats() is None
+    env.enable_profiling()
+    assert 'is_valid' in env.__dict__
+    env.reset()
+    observation, _, _, _, _ = env.step(np.array([1, 3]))
+    env.get_valid(observation)
+    stats = env.stats()
+    assert stats['step']['calls'] == 1
+    assert stats['next_step']['calls'] == 1
+    assert stats['get_valid']['calls'] == 1
+    assert stats['make_move']['calls'] >= 1
+    assert stats['step']['seconds'] >= stats['next_step']['seconds'] > 0
+
+    env.enable_cache()
+    env.get_valid(observation)
+    assert env.stats()['get_valid']['calls'] == 2
+    env.disable_cache()
+    env.get_valid(observation)
+    assert env.stats()['get_valid']['calls'] == 3
+
+    env.reset_stats()
+    assert env.stats()['get_valid']['calls'] == 0
+    env.disable_profiling()
+    assert env.stats() is None
+    assert 'is_valid' not in env.__dict__
+
+
+@pytest.mark.parametrize('env_id, kwargs', [('TicTacToe-v0', {}), ('Gomuku-v0', {}),
+        ('Reversi-v0', {'board_shape': 6}), ('Reversi-v0', {'board_shape': 6, 'use_bitboard': True}),
+        ('Go-v0', {'board_shape': 5})])
+def test_rollout(env_id, kwargs):
+    env = gym.make(env_id, **kwargs).unwrapped
+    observation, _ = env.reset()
+    results = env.rollout(observation, 20, rng=0, max_length=60)
+    assert results.dtype == boardgame2.ROLLOUT_DTYPE
+    assert np.array_equal(results, env.rollout(observation, 20, rng=0, max_length=60))
+    assert np.all(results['length'] <= 60)
+    assert np.all(results['winner'][results['truncated']] == boardgame2.EMPTY)
+    assert np.all(results['length'][results['truncated']] == 60)
+    ended = ~results['truncated']
+    assert np.all(np.isin(results['winner'], [boardgame2.BLACK, boardgame2.WHITE,
+            boardgame2.EMPTY]))
+
+    generic = boardgame2.BoardGameEnv.rollout(env, observation, 2, rng=0, max_length=60)
+    assert generic.dtype == boardgame2.ROLLOUT_DTYPE
+    if env_id == 'TicTacToe-v0':  # first player wins 58.5% of random games
+        assert np.all(ended)
+        results = env.rollout(observation, 2000, rng=0)
+        assert 0.54 < (results['winner'] == boardgame2.BLACK).mean() < 0.63
+        assert np.all((results['length'] >= 5) & (results['length'] <= 9))
+    if env_id == 'Go-v0':  # players do not fill their own eyes, so games end
+        results = env.rollout(observation, 20, rng=0)
+        assert not results['truncated'].any()
+        assert np.all(np.isin(results['winner'], [boardgame2.BLACK, boardgame2.WHITE]))
+
+
+@pytest.mark.parametrize('env_id, kwargs', [('Reversi-v0', {'board_shape': 6}),
+        ('TicTacToe-v0', {}), ('Go-v0', {'board_shape': 5})])
+def test_discrete_action_mode(env_id, kwargs):
+    env = gym.make(env_id, action_mode='discrete', **kwargs).unwrapped
+    box_env = gym.make(env_id, **kwargs).unwrapped
+    assert env.action_space.n == env.board.size + 2
+    with pytest.raises(ValueError):
+        gym.make(env_id, action_mode='flat', **kwargs)
+
+    observation, info = env.reset()
+    box_env.reset()
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        mask = info['action_mask']
+        assert np.array_equal(mask[:-2], env.get_valid(observation).ravel())
+        assert mask[-2] == (env_id == 'Go-v0')
+        assert not mask[-1]
+        action = int(rng.choice(np.flatnonzero(mask)))
+        observation, reward, termination, _, info = env.step(action)
+        box_observation, box_reward, box_termination, _, _ = box_env.step(
+                boardgame2.decode_action(action, env.board.shape))
+        assert np.array_equal(observation[0], box_observation[0])
+        assert reward == box_reward and termination == box_termination
+        if termination:
+            assert not info['action_mask'].any()
+            break
+
+    observation, info = env.reset()
+    action = int(np.flatnonzero(info['action_mask'])[0])
+    observation, _, _, _, info = env.step(action)
+    assert not info['action_mask'][action]
+    _, reward, termination, _, _ = env.step(action)  # occupied
+    assert termination == (env_id == 'Reversi-v0')  # resign, otherwise pass
+
+
+@pytest.mark.parametrize('env_id, kwargs', [('TicTacToe-v0', {}),
+        ('Reversi-v0', {'board_shape': 6}), ('Reversi-v0', {'board_shape': 6, 'use_bitboard': True}),
+        ('Go-v0', {'board_shape': 4}), ('Go-v0', {'board_shape': 4, 'allow_suicide': True})])
+def test_get_all_next_states(env_id, kwargs):
+    env = gym.make(env_id, **kwargs).unwrapped
+    rng = np.random.default_rng(0)
+    state, _ = env.reset()
+    for _ in range(40):
+        if env.get_winner(state) is not None:
+            break
+        codes, next_states = env.get_all_next_states(state)
+        assert len(codes) == len(next_states[0])
+        assert np.array_equal(codes[codes < env.board.size],
+                np.flatnonzero(env.get_valid(state)))
+        for i, code in enumerate(codes.tolist()):
+            next_state = tuple(component[i] for component in next_states)
+            expected = env.get_next_state(state, boardgame2.decode_action(code, env.board.shape))
+            assert np.array_equal(next_state[0], expected[0])
+            assert next_state[1] == expected[1]
+            if env_id == 'Go-v0':
+                assert boardgame2.get_ko(next_state) == boardgame2.get_ko(expected)
+                assert next_state[3] == expected[3]
+        state = tuple(component[rng.integers(len(codes))] for component in next_states)
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+import boardgame2
+
+
+def evaluate(states):
+    policies = np.ones((len(states), 10)) / 10
+    values = np.array([float(state[1]) for state in states])
+    return policies, values
+
+
+def test_batch_evaluator_threads():
+    env = boardgame2.KInARowEnv(board_shape=3, target_length=3)
+    observation, _ = env.reset()
+    with boardgame2.BatchEvaluator(evaluate, batch_size=8, timeout=0.05) as evaluator:
+        def search():
+            mcts = boardgame2.MCTS(env, evaluate=evaluator)
+            mcts.reset(observation)
+            mcts.search(20)
+        threads = [threading.Thread(target=search) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = evaluator.stats()
+    assert stats['requests'] == stats['states'] <= 8 * 20
+    assert stats['mean_batch_size'] > 1
+    assert 0 < stats['mean_latency'] <= stats['max_latency']
+
+
+def test_batch_evaluator_async():
+    board = np.zeros((3, 3), dtype=np.int8)
+    states = [(board, boardgame2.BLACK), (board, boardgame2.WHITE)]
+
+    async def main(evaluator):
+        return await asyncio.gather(*[evaluator.evaluate_async(states) for _ in range(3)])
+
+    with boardgame2.BatchEvaluator(evaluate, batch_size=6, timeout=1.) as evaluator:
+        results = asyncio.run(main(evaluator))
+        assert evaluator.stats()['batches'] == 1
+    for policies, values in results:
+        assert policies.shape == (2, 10)
+        assert values.tolist() == [1., -1.]
+
+
+def test_batch_evaluator_error():
+    def fail(states):
+        raise ValueError('bad states')
+
+    with boardgame2.BatchEvaluator(fail) as evaluator:
+        with pytest.raises(ValueError):
+            evaluator([(np.zeros((3, 3), dtype=np.int8), boardgame2.BLACK)])
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import gym
+
+import boardgame2
+
+
+def test_feature_builder():
+    env = boardgame2.ReversiEnv(board_shape=6)
+    builder = boardgame2.FeatureBuilder(env, history_length=2)
+    assert builder.num_planes == 6
+
+    observation, _ = env.reset()
+    next_observation, _, _, _, _ = env.step(np.array([1, 3]))
+    boards = np.stack([observation[0], next_observation[0]])
+    players = np.array([observation[1], next_observation[1]])
+    histories = builder.stack_histories([[], [observation[0]]])
+    out = builder.allocate(2)
+    planes = builder.build((boards, players), histories, out=out)
+    assert planes is out and planes.dtype == np.float32
+
+    assert np.array_equal(planes[1, 0], next_observation[0] == boardgame2.WHITE)
+    assert np.array_equal(planes[1, 1], next_observation[0] == boardgame2.BLACK)
+    assert np.array_equal(planes[1, 2], observation[0] == boardgame2.WHITE)
+    assert np.array_equal(planes[1, 3], observation[0] == boardgame2.BLACK)
+    assert not planes[0, 2:4].any()
+    assert planes[0, 4].all() and not planes[1, 4].any()
+    assert np.array_equal(planes[1, 5], env.get_valid(next_observation))
+
+
+@pytest.mark.parametrize('env', [boardgame2.KInARowEnv(board_shape=4),
+        boardgame2.GoEnv(board_shape=5)])
+def test_feature_env(env):
+    builder = boardgame2.FeatureBuilder(env, history_length=3)
+    feature_env = boardgame2.FeatureEnv(env, builder)
+    observation, info = feature_env.reset()
+    boards = [observation[0]]
+    for _ in range(3):
+        action = np.argwhere(env.get_valid(observation))[0]
+        observation, _, _, _, info = feature_env.step(action)
+        boards.append(observation[0])
+    expected = builder.build_one(observation, boards[-2::-1])
+    assert np.array_equal(info['features'], expected)
+    assert np.array_equal(info['features'][-1], env.get_valid(observation))
+    assert isinstance(feature_env, gym.Wrapper)
+    assert feature_env.unwrapped is env
+    feature_env.close()
+
+
+def test_feature_env_wrapper():
+    env = gym.make('TicTacToe-v0', new_step_api=True)
+    builder = boardgame2.FeatureBuilder(env)
+    feature_env = boardgame2.FeatureEnv(env, builder)
+    assert feature_env.spec.id == 'TicTacToe-v0'
+    assert feature_env.unwrapped is env.unwrapped
+    observation, info = feature_env.reset()
+    observation, reward, termination, truncation, info = \
+            feature_env.step(np.array([1, 1]))
+    assert info['features'].shape == (builder.num_planes, 3, 3)
+    feature_env.close()
@@ -12,10 +12,125 @@ def test_go():
     assert env.action_space.shape == (2,)
     assert np.all(env.action_space.high == [18, 18])
 
-    observation, info = env.reset()
-    while False:  # We do not test it, since it has not been fully implemented.
+    observation, info = env.reset(return_info=True)
+    for _ in range(4 * 19 * 19):
         action = env.action_space.sample()
         observation, reward, termination, truncation, info = env.step(action)
         if termination or truncation:
             break
     env.close()
+
+
+def test_go_make_move():
+    env = gym.make('Go-v0', board_shape=5, new_step_api=True)
+    board = np.zeros((5, 5), dtype=np.int8)
+    board[0, 0] = boardgame2.WHITE
+    board[0, 1] = boardgame2.BLACK
+    ko = np.zeros_like(board)
+    state = (board, boardgame2.BLACK, ko, False)
+
+    next_board, next_player, next_ko, next_pass = env.get_next_state(state, np.array([1, 0]))
+    assert next_board[0, 0] == boardgame2.EMPTY  # captured
+    assert next_player == boardgame2.WHITE
+    assert not next_pass
+
+    undo = env.make_move(state, np.array([1, 0]))
+    assert np.array_equal(board, next_board)
+    assert np.array_equal(ko, next_ko)
+    env.unmake_move(state, undo)
+    assert board[0, 0] == boardgame2.WHITE
+    assert board[1, 0] == boardgame2.EMPTY
+    env.close()
+
+
+def test_go_groups():
+    env = gym.make('Go-v0', board_shape=5, new_step_api=True)
+    board = np.array([
+            [0, 1, -1, 0, 0],
+            [1, -1, 0, -1, 0],
+            [0, 1, -1, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0]], dtype=np.int8)
+    groups = boardgame2.StoneGroups(board.copy())
+    assert groups.count_liberties(1 * 5 + 1) == 1  # in atari
+    assert groups.is_valid(1 * 5 + 2, boardgame2.BLACK)
+    assert not groups.is_eye(0, boardgame2.BLACK)  # (0, 1) is in atari
+    assert not groups.is_eye(1 * 5 + 2, boardgame2.WHITE)  # (1, 1) is in atari
+    corner = np.zeros((3, 3), dtype=np.int8)
+    corner[0, 1] = corner[1, 0] = boardgame2.WHITE
+    assert boardgame2.StoneGroups(corner).is_eye(0, boardgame2.WHITE)
+    assert not boardgame2.StoneGroups(corner).is_eye(0, boardgame2.BLACK)
+    captures, suicides = groups.place(1 * 5 + 2, boardgame2.BLACK)
+    assert captures == 1 << (1 * 5 + 1)
+    assert not suicides
+    assert groups.count_liberties(1 * 5 + 2) == 1
+
+    state = (board, boardgame2.BLACK, np.zeros_like(board), False)
+    next_board, next_player, next_ko, next_pass = env.get_next_state(state, np.array([1, 2]))
+    assert np.array_equal(next_board, groups.board)
+    assert next_ko[1, 1]
+    next_state = (next_board, next_player, next_ko, next_pass)
+    assert not env.is_valid(next_state, np.array([1, 1]))  # ko
+    assert not env.get_valid(next_state)[1, 1]
+    env.close()
+
+
+def test_go_end():
+    env = gym.make('Go-v0', board_shape=5, new_step_api=True)
+
+    observation, info = env.reset(return_info=True)  # see test_go()
+    while True:
+        action = env.action_space.sample()
+        observation, reward, termination, truncation, info = env.step(action)
+        if termination or truncation:
+            break
+    assert reward in [boardgame2.BLACK, boardgame2.WHITE]
+    env.close()
+
+
+def test_go_judger():
+    judger = boardgame2.GoJudger(komi=0.5)
+    board = np.array([
+            [0, 1, -1, 0],
+            [1, 1, -1, -1],
+            [0, 1, -1, 0],
+            [1, 0, 1, -1]], dtype=np.int8)
+    count_black, count_white = judger.score(board)
+    assert count_black == 9  # 6 stones, (0, 0), (2, 0) and (3, 1)
+    assert count_white == 7  # 5 stones, (0, 3) and (2, 3)
+    assert judger(board) == boardgame2.BLACK
+    assert np.array_equal(judger(np.stack([board, -board])),
+            [boardgame2.BLACK, boardgame2.WHITE])
+
+
+def test_go_state():
+    env = boardgame2.GoEnv(board_shape=(3, 4))
+    board = np.array([[0, 1, -1, 0], [1, -1, 0, -1], [0, 1, -1, 0]], dtype=np.int8)
+    state = boardgame2.GoState(board, boardgame2.BLACK)
+    next_state = env.get_next_state(state, np.array([1, 2]))
+    assert isinstance(next_state, boardgame2.GoState)
+    assert next_state.ko == 5  # the captured stone in the middle
+    next_board, next_player, next_ko, next_pass = next_state
+    assert next_ko[1, 1] and next_ko.sum() == 1
+    assert not env.is_valid(next_state, np.array([1, 1]))
+    assert env.is_valid(tuple(next_state), np.array([0, 3]))
+
+
+def test_go_next_step():
+    env = boardgame2.GoEnv(board_shape=5)
+    rng = np.random.default_rng(0)
+    observation, info = env.reset(return_info=True)
+    state, key = observation, info['hash']
+    for _ in range(100):
+        locations = np.argwhere(env.get_valid(observation))
+        action = env.PASS if not len(locations) or rng.random() < 0.05 \
+                else locations[rng.integers(len(locations))]
+        state, reward, termination, info = env.next_step(state, action, key)
+        key = info['hash']
+        observation, step_reward, step_termination, _, step_info = env.step(action)
+        assert key == step_info['hash']
+        assert reward == step_reward and termination == step_termination
+        if termination:
+            break
+        for component, expected in zip(state, observation):
+            assert np.array_equal(component, expected)
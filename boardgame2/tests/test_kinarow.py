@@ -35,3 +35,47 @@ def test_gomuku():
         if termination or truncation:
             break
     env.close()
+
+
+def test_kinarow_incremental_winner():
+    env = gym.make('KInARow-v0', board_shape=(4, 6), target_length=3, new_step_api=True)
+
+    observation, info = env.reset()
+    while True:
+        locations = np.argwhere(env.get_valid(observation))
+        action = locations[np.random.randint(len(locations))]
+        next_state = env.get_next_state(observation, action)
+        assert env.get_winner(next_state, action) == env.get_winner(next_state)
+        observation, reward, termination, truncation, info = env.step(action)
+        if termination or truncation:
+            break
+    env.close()
+
+
+def test_kinarow_winner_batch():
+    env = gym.make('KInARow-v0', board_shape=(4, 5), target_length=3, new_step_api=True)
+    boards = np.zeros((6, 4, 5), dtype=np.int8)
+    boards[1, 2, 1:4] = boardgame2.BLACK  # row
+    boards[2, 1:4, 4] = boardgame2.WHITE  # column
+    boards[3, [0, 1, 2], [0, 1, 2]] = boardgame2.WHITE  # diagonal
+    boards[4, [1, 2, 3], [4, 3, 2]] = boardgame2.BLACK  # anti-diagonal
+    boards[5] = [[1, 1, -1, -1, 1], [-1, -1, 1, 1, -1], [1, 1, -1, -1, 1], [-1, -1, 1, 1, -1]]
+    winners = env.get_winner_batch(boards)
+    assert np.isnan(winners[0])
+    assert np.array_equal(winners[1:], [1, -1, -1, 1, 0])
+    env.close()
+
+
+@pytest.mark.parametrize('dtype', [np.int8, int])
+def test_kinarow_draw(dtype):
+    env = boardgame2.KInARowEnv(board_shape=3, target_length=3)
+    board = np.array([[1, -1, 1], [1, -1, -1], [-1, 1, 1]], dtype=dtype)
+    assert env.get_winner((board, boardgame2.WHITE), np.array([2, 2])) == 0
+    assert env.get_winner((board, boardgame2.WHITE)) == 0
+    previous = board.copy()
+    previous[2, 2] = boardgame2.EMPTY
+    state, reward, termination, info = env.next_step((previous, boardgame2.BLACK),
+            np.array([2, 2]))
+    assert termination and reward == 0 and np.array_equal(state[0], board)
+    board[0, 0] = boardgame2.EMPTY
+    assert env.get_winner((board, boardgame2.BLACK), np.array([2, 2])) is None
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import boardgame2
+
+
+def zero_evaluate(states):
+    return None, np.zeros(len(states))
+
+
+@pytest.mark.parametrize('selection', ['puct', 'uct'])
+@pytest.mark.parametrize('batch_size', [1, 4])
+def test_mcts_win(selection, batch_size):
+    env = boardgame2.KInARowEnv(board_shape=3, target_length=3)
+    board = np.array([[1, 1, 0], [-1, -1, 0], [0, 0, 0]], dtype=np.int8)
+    evaluate = boardgame2.RolloutEvaluator(env, np.random.default_rng(0))
+    mcts = boardgame2.MCTS(env, evaluate=evaluate, selection=selection,
+            batch_size=batch_size)
+    mcts.reset((board, boardgame2.BLACK))
+    policy = mcts.search(300)
+    assert policy.shape == (10,) and np.isclose(policy.sum(), 1.)
+    assert np.array_equal(mcts.select_action(), [0, 2])
+    assert mcts.get_value() > 0.5
+
+
+def test_mcts_advance():
+    env = boardgame2.ReversiEnv(board_shape=6)
+    observation, _ = env.reset()
+    mcts = boardgame2.MCTS(env, evaluate=zero_evaluate, capacity=16)
+    mcts.reset(observation)
+    mcts.search(200)
+    action = mcts.select_action()
+    child, = [child for child in mcts._children(mcts.root)
+            if mcts.action[child] == action[0] * 6 + action[1]]
+    visits = mcts.visits[child]
+    size = mcts.size
+
+    mcts.advance(action)
+    assert mcts.root == 0 and mcts.visits[0] == visits
+    assert mcts.size < size
+    next_state = env.get_next_state(observation, action)
+    assert np.array_equal(mcts.states[0][0], next_state[0])
+    children = mcts._children(0)
+    assert all(mcts.parent[child] == 0 for child in children)
+    assert sum(mcts.visits[child] for child in children) == visits - 1
+    mcts.search(50)
+    assert mcts.visits[0] == visits + 50
+
+
+def test_mcts_go():
+    env = boardgame2.GoEnv(board_shape=4)
+    observation, _ = env.reset()
+    mcts = boardgame2.MCTS(env, evaluate=zero_evaluate, batch_size=8)
+    mcts.reset(observation)
+    policy = mcts.search(100)
+    assert policy.shape == (17,) and policy[-1] > 0  # PASS is searched
+    action = mcts.select_action()
+    assert env.is_valid(observation, action) or np.array_equal(action, env.PASS)
@@ -0,0 +1,48 @@
+import numpy as np
+
+import boardgame2
+
+
+def test_record(tmp_path):
+    path = str(tmp_path / 'games.bin')
+    env = boardgame2.ReversiEnv(board_shape=6)
+    np.random.seed(0)
+    games = []
+    with boardgame2.GameRecordWriter(path, env) as writer:
+        for _ in range(3):
+            observation, _ = writer.reset()
+            states = [observation]
+            while True:
+                action = boardgame2.random_agent(env, observation)
+                observation, reward, termination, truncation, _ = writer.step(action)
+                states.append(observation)
+                if termination:
+                    break
+            games.append((states, reward))
+        writer.reset(game_id=10)  # unfinished game
+        writer.step(np.array([1, 3]))
+
+    reader = boardgame2.GameRecordReader(path, env)
+    assert len(reader) == 4
+    assert reader.game_ids.tolist() == [0, 1, 2, 10]
+    assert reader.ended.tolist() == [True, True, True, False]
+    assert reader.num_positions == sum(len(states) - 1 for states, _ in games) + 1
+    for game, (states, winner) in enumerate(games):
+        assert reader.winners[game] == winner
+        for state, replayed_state in zip(states, reader.iter_states(game)):
+            assert np.array_equal(state[0], replayed_state[0])
+            assert state[1] == replayed_state[1]
+    board, player = reader.get_state(3, 1)
+    assert board[1, 3] == boardgame2.BLACK and player == boardgame2.WHITE
+
+    samples = reader.sample(10, np.random.default_rng(0))
+    for state, action, winner in samples:
+        assert env.is_valid(state, action)
+
+
+def test_encode_action():
+    board_shape = (3, 4)
+    for action in [np.array([0, 0]), np.array([2, 3]), boardgame2.BoardGameEnv.PASS,
+            boardgame2.BoardGameEnv.RESIGN]:
+        code = boardgame2.encode_action(action, board_shape)
+        assert np.array_equal(boardgame2.decode_action(code, board_shape), action)
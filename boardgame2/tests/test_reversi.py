@@ -19,3 +19,97 @@ def test_reversi():
         if termination or truncation:
             break
     env.close()
+
+
+@pytest.mark.parametrize('board_shape', [8, 6, (4, 6)])
+def test_reversi_bitboard(board_shape):
+    env = gym.make('Reversi-v0', board_shape=board_shape, new_step_api=True)
+    bitboard_env = gym.make('Reversi-v0', board_shape=board_shape,
+            use_bitboard=True, new_step_api=True)
+
+    observation, info = env.reset()
+    while True:
+        valid = env.get_valid(observation)
+        assert np.array_equal(valid, bitboard_env.get_valid(observation))
+        assert env.has_valid(observation) == bitboard_env.has_valid(observation)
+        assert env.get_winner(observation) == bitboard_env.get_winner(observation)
+        board, player = observation
+        own = boardgame2.get_bitboard(board, player)
+        opp = boardgame2.get_bitboard(board, -player)
+        moves = [(move.bit_length() - 1, sorted(np.flatnonzero(
+                boardgame2.get_bitboard_array(flips, board.shape)).tolist()))
+                for move, flips in boardgame2.get_bitboard_moves(own, opp, board.shape)]
+        assert moves == [(i, sorted(flips)) for i, flips in
+                boardgame2.get_scalar_moves(board, player)]
+        locations = np.argwhere(valid)
+        action = locations[np.random.randint(len(locations))]
+        next_board, next_player = bitboard_env.get_next_state(observation, action)
+        observation, reward, termination, truncation, info = env.step(action)
+        assert np.array_equal(observation[0], next_board)
+        if termination or truncation:
+            break
+    env.close()
+
+
+def test_reversi_make_move():
+    env = gym.make('Reversi-v0', new_step_api=True)
+
+    observation, info = env.reset()
+    while True:
+        locations = np.argwhere(env.get_valid(observation))
+        action = locations[np.random.randint(len(locations))]
+        board, player = observation[0].copy(), observation[1]
+        next_board, _ = env.get_next_state(observation, action)
+        undo = env.make_move((board, player), action)
+        assert np.array_equal(board, next_board)
+        env.unmake_move((board, player), undo)
+        assert np.array_equal(board, observation[0])
+        observation, reward, termination, truncation, info = env.step(action)
+        if termination or truncation:
+            break
+    env.close()
+
+
+@pytest.mark.parametrize('board_shape', [(10, 12), (6, 6)])
+def test_reversi_array(board_shape):
+    env = boardgame2.ReversiEnv(board_shape=board_shape)
+    boards, players, actions = [], [], []
+    observation, info = env.reset()
+    while True:
+        board, player = observation
+        valid = boardgame2.get_array_valid(board, player)
+        locations = np.argwhere(valid)
+        action = locations[np.random.randint(len(locations))]
+        flips = boardgame2.get_array_flips(board, player, action)
+        moves = dict(boardgame2.get_scalar_moves(board, player))
+        assert list(moves) == np.flatnonzero(valid).tolist()
+        assert sorted(moves[action[0] * board.shape[1] + action[1]]) == \
+                np.flatnonzero(flips).tolist()
+        next_board = board.copy()
+        next_board[flips] = player
+        next_board[tuple(action)] = player
+        observation, reward, termination, truncation, info = env.step(action)
+        assert np.array_equal(observation[0], next_board)
+        boards.append(board)
+        players.append(player)
+        actions.append(action)
+        if termination or len(boards) >= 40:
+            break
+
+    boards, players = np.stack(boards), np.array(players)
+    valid = boardgame2.get_array_valid(boards, players)
+    flips = boardgame2.get_array_flips(boards, players, np.stack(actions))
+    for i in range(len(boards)):
+        assert np.array_equal(valid[i], boardgame2.get_array_valid(boards[i], players[i]))
+        assert np.array_equal(flips[i],
+                boardgame2.get_array_flips(boards[i], players[i], actions[i]))
+
+
+def test_reversi_tiny():
+    env = boardgame2.ReversiEnv(board_shape=2)
+    observation, info = env.reset()
+    board, player = observation
+    assert boardgame2.get_scalar_moves(board, player) == []
+    assert np.array_equal(env.get_valid(observation), boardgame2.get_array_valid(board, player))
+    assert not env.get_valid(observation).any() and not env.has_valid(observation)
+    assert env.get_winner(observation) == boardgame2.EMPTY
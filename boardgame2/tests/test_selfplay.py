@@ -0,0 +1,31 @@
+import numpy as np
+
+import boardgame2
+
+
+def test_play_games():
+    kwargs = dict(num_games=20, batch_size=3, seed=0)
+    results, info = boardgame2.play_games('TicTacToe-v0', num_workers=2, **kwargs)
+    assert results.shape == (20,)
+    assert np.isin(results['winner'], [-1, 0, 1]).all()
+    assert ((results['length'] >= 5) & (results['length'] <= 9)).all()
+    assert info['games'] == 20 and info['games_per_second'] > 0
+
+    finished = []
+    serial_results, _ = boardgame2.play_games('TicTacToe-v0', num_workers=0,
+            callback=lambda count, total: finished.append(count), **kwargs)
+    assert finished[-1] == 20
+    for field in ['winner', 'length', 'truncated']:
+        assert np.array_equal(results[field], serial_results[field])
+
+
+def test_play_games_truncated():
+    results, _ = boardgame2.play_games('Reversi-v0', num_games=2, num_workers=0,
+            max_length=10)
+    assert results['truncated'].all() and (results['length'] == 10).all()
+    assert (results['winner'] == 0).all()
+
+
+def test_play_games_step_api(recwarn):
+    boardgame2.play_games('TicTacToe-v0', num_games=1, num_workers=0)
+    assert not [warning for warning in recwarn if 'step API' in str(warning.message)]
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import boardgame2
+
+
+@pytest.mark.parametrize('env, value', [
+        (boardgame2.KInARowEnv(board_shape=3, target_length=3), 0),
+        (boardgame2.KInARowEnv(board_shape=4, target_length=3), 1),
+        (boardgame2.KInARowEnv(board_shape=4, target_length=4), 0),
+        (boardgame2.ReversiEnv(board_shape=4), -1),
+        ])
+def test_solver(env, value):
+    observation, _ = env.reset()
+    solver = boardgame2.Solver(env)
+    assert solver.solve(observation)[0] == value
+
+
+def test_solver_move():
+    env = boardgame2.KInARowEnv(board_shape=3, target_length=3)
+    board = np.array([[1, 0, 0], [-1, -1, 0], [0, 0, 1]], dtype=np.int8)
+    solver = boardgame2.Solver(env)
+    value, action = solver.solve((board, boardgame2.BLACK))
+    assert value == 0 and np.array_equal(action, [1, 2])  # block the line
+    value, action = solver.solve((board, boardgame2.WHITE))
+    assert value == 1 and np.array_equal(action, [1, 2])
+    assert solver.solve((board, boardgame2.WHITE), max_depth=1)[0] == 1
+
+
+def test_solver_export(tmp_path):
+    env = boardgame2.KInARowEnv(board_shape=3, target_length=3)
+    solver = boardgame2.Solver(env)
+    path = str(tmp_path / 'table.npz')
+    assert solver.export(path, max_states=50) == 50
+    table = np.load(path)
+    assert table['boards'].shape == (50, 3, 3)
+    for board, player, value, move in zip(table['boards'], table['players'],
+            table['values'], table['moves']):
+        assert solver.get_value((board, player)) == value
+        if move >= 0:
+            next_state = env.get_next_state((board, player), np.array(divmod(move, 3)))
+            assert -solver.get_value(next_state) == value
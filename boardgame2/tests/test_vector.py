@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import gym
+
+import boardgame2
+
+
+@pytest.mark.parametrize('env_id', ['Reversi-v0', 'TicTacToe-v0', 'Gomuku-v0'])
+def test_vector(env_id):
+    num_envs = 4
+    vector_env = boardgame2.BoardGameVectorEnv(env_id, num_envs)
+    envs = [gym.make(env_id, new_step_api=True) for _ in range(num_envs)]
+    assert vector_env.observation_space[0].shape == \
+            (num_envs,) + envs[0].observation_space[0].shape
+
+    boards, players = vector_env.reset()[0]
+    for env in envs:
+        env.reset()
+    for _ in range(30):
+        valid = vector_env.get_valid((boards, players))
+        actions = []
+        for board, player, env, v in zip(boards, players, envs, valid):
+            assert np.array_equal(v, env.get_valid((board, player)))
+            locations = np.argwhere(v)
+            actions.append(locations[np.random.randint(len(locations))])
+        actions = np.array(actions)
+        (boards, players), rewards, terminations, truncations, infos = \
+                vector_env.step(actions)
+        for i, env in enumerate(envs):
+            observation, reward, termination, truncation, info = env.step(actions[i])
+            assert termination == terminations[i]
+            assert reward == rewards[i]
+            if termination:
+                assert np.array_equal(infos['final_observation'][i][0], observation[0])
+                observation, info = env.reset()
+            assert np.array_equal(observation[0], boards[i])
+            assert observation[1] == players[i]
+    vector_env.close()
+
+
+def test_vector_step_api(recwarn):
+    boardgame2.BoardGameVectorEnv('TicTacToe-v0', 2)
+    assert not [warning for warning in recwarn if 'step API' in str(warning.message)]
+
+
+def test_vector_go():
+    with pytest.raises(ValueError, match='Go is not supported'):
+        boardgame2.BoardGameVectorEnv(boardgame2.GoEnv(board_shape=5), 2)
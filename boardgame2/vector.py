@@ -0,0 +1,241 @@
+import copy
+
+import numpy as np
+import gym
+from gym.vector import VectorEnv
+
+from .env import EMPTY, BLACK
+from .env import BoardGameEnv
+from .reversi import ReversiEnv, get_array_valid, get_array_flips
+from .kinarow import KInARowEnv
+from .go import GoEnv
+
+
+def _reversi_get_next_state(boards, players, locations):
+    """Place discs and flip in place. Locations must be valid."""
+    flips = get_array_flips(boards, players, locations)
+    boards[flips] = np.broadcast_to(players.reshape(-1, 1, 1), boards.shape)[flips]
+    boards[np.arange(len(boards)), locations[:, 0], locations[:, 1]] = players
+
+
+def _reversi_get_winner(boards, players):
+    terminated = ~(get_array_valid(boards, players).any(axis=(1, 2)) |
+            get_array_valid(boards, -players).any(axis=(1, 2)))
+    winners = np.sign(boards.sum(axis=(1, 2), dtype=int)).astype(np.int8)
+    return terminated, winners
+
+
+def get_valid_batch(env, states) -> np.array:
+    """Get all valid locations for a batch of states of an env.
+
+    Reversi and games whose valid locations are the empty ones (see
+    BoardGameEnv.VALID_IS_EMPTY) are checked by array operations, and other
+    games by env.get_valid() for every state.
+
+    Parameters
+    ----
+    env : BoardGameEnv
+    states : tuple    batched components of the states, such as boards of
+        shape (N, H, W) and players of shape (N,)
+
+    Returns
+    ----
+    valid : np.array    shape (N, H, W)
+    """
+    env = env.unwrapped
+    boards, players = states[0], states[1]
+    if isinstance(env, ReversiEnv):
+        return get_array_valid(boards, players)
+    if env.VALID_IS_EMPTY:
+        return (boards == EMPTY).astype(np.int8)
+    return np.stack([env.get_valid(tuple(component[i] for component in states))
+            for i in range(len(boards))])
+
+
+class BoardGameVectorEnv(VectorEnv):
+
+    def __init__(self, env, num_envs: int, copy: bool=True, **kwargs):
+        """Create a batch of board games that are stepped by array operations.
+
+        Parameters
+        ----
+        env : str or BoardGameEnv    registered id or instance of the single game.
+            Go is not supported, because its states have more components
+            than the board and the player.
+        num_envs : int    number of boards
+        copy : bool=True
+            - True:  return copies of the internal boards and players
+            - False: return the internal arrays, which are updated in place
+        kwargs : dict    keyword arguments for gym.make() when env is str
+        """
+        if isinstance(env, str):
+            kwargs.setdefault('new_step_api', True)
+            env = gym.make(env, **kwargs)
+        self.env = env.unwrapped
+        if isinstance(self.env, GoEnv):
+            raise ValueError('Go is not supported')
+        super().__init__(num_envs, self.env.observation_space, self.env.action_space,
+                new_step_api=True)
+        self.copy = copy
+
+        (initial_board, _), _ = self.env.reset()
+        self.initial_board = np.array(initial_board, dtype=np.int8)
+        self.boards = np.repeat(self.initial_board[None], num_envs, axis=0)
+        self.players = np.full(num_envs, BLACK, dtype=np.int8)
+
+    def get_valid(self, states):
+        """Get all valid locations for a batch of states.
+
+        Parameters
+        ----
+        states : (np.array, np.array)    boards of shape (N, H, W) and players of shape (N,)
+
+        Returns
+        ----
+        valid : np.array    shape (N, H, W)
+        """
+        return get_valid_batch(self.env, states)
+
+    def get_winner(self, states):
+        """Check whether a batch of games has ended. If so, who is the winner.
+
+        Parameters
+        ----
+        states : (np.array, np.array)    boards of shape (N, H, W) and players of shape (N,)
+
+        Returns
+        ----
+        terminations : np.array    bool of shape (N,)
+        winners : np.array    int8 of shape (N,). Only meaningful for ended games.
+        """
+        boards, players = states
+        if isinstance(self.env, ReversiEnv):
+            return _reversi_get_winner(boards, players)
+        if isinstance(self.env, KInARowEnv):
+            winners = self.env.get_winner_batch(boards)
+            terminations = ~np.isnan(winners)
+            return terminations, np.nan_to_num(winners).astype(np.int8)
+        winners = [self.env.get_winner((board, player))
+                for board, player in zip(boards, players)]
+        terminations = np.array([winner is not None for winner in winners])
+        winners = np.array([winner or 0 for winner in winners], dtype=np.int8)
+        return terminations, winners
+
+    def get_next_state(self, states, actions):
+        """Get the next states. Invalid actions are treated as pass.
+
+        Parameters
+        ----
+        states : (np.array, np.array)    boards of shape (N, H, W) and players of shape (N,)
+        actions : np.array    locations of shape (N, 2)
+
+        Returns
+        ----
+        next_states : (np.array, np.array)    next boards and next players
+        """
+        boards, players = states
+        boards, players = boards.copy(), players.copy()
+        valid = self._is_valid((boards, players), actions)
+        self._place(boards, players, actions, valid)
+        return boards, -players
+
+    def _is_valid(self, states, actions):
+        boards, _ = states
+        h, w = boards.shape[-2:]
+        x, y = actions[:, 0], actions[:, 1]
+        inside = (x >= 0) & (x < h) & (y >= 0) & (y < w)
+        valid = self.get_valid(states)
+        return inside & (valid[np.arange(len(boards)), np.clip(x, 0, h - 1),
+                np.clip(y, 0, w - 1)] != 0)
+
+    def _place(self, boards, players, actions, valid):
+        if isinstance(self.env, ReversiEnv):
+            placed = boards[valid]
+            _reversi_get_next_state(placed, players[valid], actions[valid])
+            boards[valid] = placed
+            return
+        if isinstance(self.env, KInARowEnv):
+            index = np.flatnonzero(valid)
+            boards[index, actions[valid, 0], actions[valid, 1]] = players[valid]
+            return
+        for i in np.flatnonzero(valid):
+            boards[i], _ = self.env.get_next_state((boards[i], players[i]), actions[i])
+
+    def reset(self, *, seed=None, return_info=True, options=None):
+        """Reset all games. See gym.vector.VectorEnv.reset()
+
+        Returns
+        ----
+        next_states : (np.array, np.array)    boards of shape (N, H, W) and players of shape (N,)
+        """
+        if seed is not None:
+            self.action_space.seed(seed)
+        self.boards[:] = self.initial_board
+        self.players[:] = BLACK
+        observation = self._get_observation()
+        if return_info:
+            return observation, {}
+        else:
+            return observation
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=int).reshape(self.num_envs, 2)
+
+    def step_wait(self):
+        """See gym.vector.VectorEnv.step_wait(). Ended games are reset automatically,
+        and their last observations are stored in info['final_observation'].
+
+        Returns
+        ----
+        next_states : (np.array, np.array)    next boards and next players
+        rewards : np.array    the winners or zeros
+        terminations : np.array
+        truncations : np.array
+        infos : dict
+        """
+        actions = self._actions
+        boards, players = self.boards, self.players
+        rewards = np.zeros(self.num_envs)
+        valid = self._is_valid((boards, players), actions)
+        if np.array_equal(self.env.illegal_equivalent_action, BoardGameEnv.RESIGN):
+            resigned = ~valid
+        else:
+            resigned = np.zeros(self.num_envs, dtype=bool)
+        rewards[resigned] = -players[resigned]
+
+        playing = ~resigned
+        self._place(boards, players, actions, valid & playing)
+        players[playing] = -players[playing]
+
+        terminations, winners = self.get_winner((boards, players))
+        terminations &= playing
+        rewards[terminations] = winners[terminations]
+        while True:  # pass for players that have no valid locations
+            ongoing = np.flatnonzero(playing & ~terminations)
+            if not ongoing.size:
+                break
+            stuck = ~self.get_valid((boards[ongoing], players[ongoing])).any(axis=(1, 2))
+            if not stuck.any():
+                break
+            players[ongoing[stuck]] *= -1
+        terminations |= resigned
+
+        infos = {}
+        if terminations.any():
+            final_observations = np.empty(self.num_envs, dtype=object)
+            for i in np.flatnonzero(terminations):
+                final_observations[i] = (boards[i].copy(), players[i])
+            infos['final_observation'] = final_observations
+            infos['_final_observation'] = terminations.copy()
+            boards[terminations] = self.initial_board
+            players[terminations] = BLACK
+        truncations = np.zeros(self.num_envs, dtype=bool)
+        return self._get_observation(), rewards, terminations, truncations, infos
+
+    def _get_observation(self):
+        if self.copy:
+            return copy.deepcopy((self.boards, self.players))
+        return self.boards, self.players
+
+    def close_extras(self, **kwargs):
+        self.env.close()